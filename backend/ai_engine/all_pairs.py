@@ -0,0 +1,83 @@
+"""
+Bounded-memory all-pairs scoring of two sets of normalized embeddings.
+
+Scores every row of A against every row of B one tile at a time, with one
+matrix product per tile, and keeps only the best k_a matches of each A row
+and the best k_b matches of each B row. A and B may be memory-mapped; only
+one tile of each is read into memory at a time.
+"""
+import numpy as np
+
+
+def tile_size(dimensions, memory_bytes, k=0):
+    """
+    Largest square tile whose working set fits in memory_bytes
+
+    Per tile: two float32 input blocks (t x dimensions), the float32 score
+    block (t x t) and about two more score-sized buffers for the top-k
+    merges, which also carry k extra columns.
+    """
+    # 12 t^2 + (8 dimensions + 24 k) t - memory_bytes = 0
+    b = 8 * dimensions + 24 * k
+    t = int((-b + np.sqrt(b * b + 48.0 * memory_bytes)) / 24)
+    return max(t, 1)
+
+
+def _merge_top_k(best_scores, best_indices, scores, indices, k):
+    """
+    Merge candidate (scores, indices) columns into running top-k arrays, row-wise
+
+    best_* are (rows, <=k); scores/indices are (rows, m). Returns new best_*,
+    sorted best first.
+    """
+    scores = np.concatenate([best_scores, scores], axis=1)
+    indices = np.concatenate([best_indices, indices], axis=1)
+    if scores.shape[1] > k:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, top, axis=1)
+        indices = np.take_along_axis(indices, top, axis=1)
+    order = np.argsort(-scores, axis=1, kind='stable')
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+
+def all_pairs_top_k(a, b, k_a, k_b, memory_bytes=64 * 2**20):
+    """
+    Best matches in both directions between the rows of a and b
+
+    Returns (a_indices, a_scores, b_indices, b_scores): a_indices[i] are the
+    rows of b that score highest against a[i] (best first, at most k_a of
+    them), and b_indices[j] likewise the best rows of a for b[j].
+    """
+    n_a, dimensions = a.shape
+    n_b = len(b)
+    k_a = min(k_a, n_b)
+    k_b = min(k_b, n_a)
+    tile = tile_size(dimensions, memory_bytes, max(k_a, k_b))
+
+    a_scores = np.full((n_a, k_a), -np.inf, dtype=np.float32)
+    a_indices = np.full((n_a, k_a), -1, dtype=np.int64)
+    b_scores = np.full((n_b, k_b), -np.inf, dtype=np.float32)
+    b_indices = np.full((n_b, k_b), -1, dtype=np.int64)
+
+    for a_start in range(0, n_a, tile):
+        a_end = min(a_start + tile, n_a)
+        a_tile = np.asarray(a[a_start:a_end], dtype=np.float32)
+        a_rows = np.arange(a_start, a_end)
+
+        for b_start in range(0, n_b, tile):
+            b_end = min(b_start + tile, n_b)
+            b_tile = np.asarray(b[b_start:b_end], dtype=np.float32)
+            scores = a_tile @ b_tile.T
+
+            if k_a:
+                candidates = np.broadcast_to(np.arange(b_start, b_end), scores.shape)
+                a_scores[a_start:a_end], a_indices[a_start:a_end] = _merge_top_k(
+                    a_scores[a_start:a_end], a_indices[a_start:a_end], scores, candidates, k_a
+                )
+            if k_b:
+                candidates = np.broadcast_to(a_rows, scores.T.shape)
+                b_scores[b_start:b_end], b_indices[b_start:b_end] = _merge_top_k(
+                    b_scores[b_start:b_end], b_indices[b_start:b_end], scores.T, candidates, k_b
+                )
+
+    return a_indices, a_scores, b_indices, b_scores
@@ -0,0 +1,103 @@
+import queue
+import threading
+import time
+
+
+class _PendingRequest:
+    def __init__(self, texts):
+        self.texts = texts
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class BatchingEncoder:
+    """
+    Dynamic micro-batching in front of an encoder.
+
+    Concurrent encode() calls are queued; a single worker thread waits up to
+    max_wait_ms for more requests (or until max_batch_size texts), runs them
+    through the wrapped encoder as one batch and hands each caller its rows.
+    Because only that thread touches the model, callers never run the model
+    concurrently.
+    """
+
+    def __init__(self, encoder, max_batch_size=64, max_wait_ms=5):
+        self.encoder = encoder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._requests = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._requests_total = 0
+        self._batches_total = 0
+        self._texts_total = 0
+        self._last_batch_size = 0
+        self._max_batch_seen = 0
+
+        self._worker = threading.Thread(target=self._run, name='embedding-batcher', daemon=True)
+        self._worker.start()
+
+    def encode(self, texts):
+        """Queue texts for the next batch and wait for their embeddings"""
+        request = _PendingRequest(list(texts))
+        self._requests.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self):
+        batch = [self._requests.get()]
+        size = len(batch[0].texts)
+        # Give concurrent callers a few milliseconds to join the batch; the
+        # wait is counted from the first request, however many trickle in
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            try:
+                request = self._requests.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch, size
+
+    def _run(self):
+        while True:
+            batch, size = self._collect()
+
+            with self._stats_lock:
+                self._requests_total += len(batch)
+                self._batches_total += 1
+                self._texts_total += size
+                self._last_batch_size = size
+                self._max_batch_seen = max(self._max_batch_seen, size)
+
+            texts = [text for request in batch for text in request.texts]
+            try:
+                embeddings = self.encoder.encode(texts)
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+                    request.done.set()
+                continue
+
+            start = 0
+            for request in batch:
+                request.result = embeddings[start:start + len(request.texts)]
+                start += len(request.texts)
+                request.done.set()
+
+    def stats(self):
+        """Queue depth and batch size metrics"""
+        with self._stats_lock:
+            return {'batching': {
+                'queue_depth': self._requests.qsize(),
+                'requests': self._requests_total,
+                'batches': self._batches_total,
+                'last_batch_size': self._last_batch_size,
+                'max_batch_size_seen': self._max_batch_seen,
+                'avg_batch_size': round(self._texts_total / self._batches_total, 2) if self._batches_total else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+            }}
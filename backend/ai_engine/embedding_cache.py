@@ -0,0 +1,237 @@
+"""
+Content-addressed cache in front of encode().
+
+Embeddings are keyed by a hash of (model name, text), so identical texts -
+repeated requirement sentences, "Skills: ..." strings, duplicate resumes -
+are encoded once. A bounded in-memory LRU tier sits in front of an optional
+on-disk tier: a fixed-size, memory-mapped hash table in a .npy file that
+every process on the machine can share.
+"""
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+def cache_key(model_name, text):
+    return hashlib.blake2b(f'{model_name}\0{text}'.encode('utf-8'), digest_size=16).digest()
+
+
+class LRUCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key, vector):
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class DiskCache:
+    """
+    Memory-mapped open-addressing hash table shared across processes.
+
+    Each slot holds a 16-byte key, a CRC32 of the key and vector, and the
+    vector. A writer clears the key, writes the vector and checksum, then
+    sets the key. Readers check the checksum against the key they looked up
+    and re-read the slot's key after copying the vector, so a slot rewritten
+    by another process mid-read (even for a different text) reads as a miss
+    rather than a wrong vector. When all probe slots are taken, the key's
+    home slot is overwritten (an eviction).
+    """
+
+    PROBES = 8
+
+    def __init__(self, path, slots, dimensions):
+        self.path = path
+        self.slots = slots
+        self.dimensions = dimensions
+        self._table = self._open()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def slot_dtype(dimensions):
+        return np.dtype([('key', 'V16'), ('check', '<u4'), ('vector', '<f4', (dimensions,))])
+
+    def _open(self):
+        if not os.path.exists(self.path):
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            table = np.lib.format.open_memmap(
+                tmp_path, mode='w+', dtype=self.slot_dtype(self.dimensions), shape=(self.slots,)
+            )
+            table.flush()
+            del table
+            # Another process may have created it meanwhile; either file is valid
+            os.replace(tmp_path, self.path)
+
+        table = np.lib.format.open_memmap(self.path, mode='r+')
+        if table.dtype != self.slot_dtype(self.dimensions):
+            raise ValueError(f'Embedding disk cache {self.path} has a different layout')
+        self.slots = len(table)
+        return table
+
+    @classmethod
+    def open_existing(cls, path, slots):
+        """Open a cache file another process created, or return None"""
+        if not os.path.exists(path):
+            return None
+        table = np.lib.format.open_memmap(path, mode='r')
+        dimensions = table.dtype['vector'].shape[0]
+        del table
+        return cls(path, slots, dimensions)
+
+    @staticmethod
+    def checksum(key, vector):
+        return zlib.crc32(vector.tobytes(), zlib.crc32(key))
+
+    def _probe(self, key):
+        home = int.from_bytes(key[:8], 'little') % self.slots
+        return [(home + i) % self.slots for i in range(self.PROBES)]
+
+    def get(self, key):
+        for slot in self._probe(key):
+            entry = self._table[slot]
+            stored_key = bytes(entry['key'])
+            if stored_key == key:
+                vector = np.array(entry['vector'], dtype=np.float32)
+                check = int(entry['check'])
+                if self.checksum(key, vector) == check and bytes(self._table[slot]['key']) == key:
+                    self.hits += 1
+                    return vector
+                break
+            if stored_key == bytes(16):
+                break
+        self.misses += 1
+        return None
+
+    def put(self, key, vector):
+        empty = bytes(16)
+        slots = self._probe(key)
+        target = None
+        for slot in slots:
+            stored_key = bytes(self._table[slot]['key'])
+            if stored_key == key or stored_key == empty:
+                target = slot
+                break
+        if target is None:
+            target = slots[0]
+            self.evictions += 1
+
+        vector = np.asarray(vector, dtype=np.float32)
+        entry = self._table[target:target + 1]
+        entry['key'] = np.void(empty)
+        entry['vector'] = vector
+        entry['check'] = self.checksum(key, vector)
+        entry['key'] = np.void(key)
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'slots': self.slots,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class CachingEncoder:
+    """Encoder wrapper that only sends texts missing from the cache to the wrapped encoder"""
+
+    def __init__(self, encoder, model_name, max_entries=10000, disk_path=None, disk_slots=200000):
+        self.encoder = encoder
+        self.model_name = model_name
+        self.memory = LRUCache(max_entries)
+        self.disk_path = disk_path
+        self.disk_slots = disk_slots
+        self.disk = None
+        self._disk_lock = threading.Lock()
+
+    def _disk(self, dimensions=None):
+        """The disk tier, opened once the file exists or the vector size is known"""
+        if self.disk is None and self.disk_path:
+            with self._disk_lock:
+                if self.disk is None:
+                    if dimensions is None:
+                        self.disk = DiskCache.open_existing(self.disk_path, self.disk_slots)
+                    else:
+                        self.disk = DiskCache(self.disk_path, self.disk_slots, dimensions)
+        return self.disk
+
+    def encode(self, texts):
+        texts = list(texts)
+        keys = [cache_key(self.model_name, text) for text in texts]
+
+        disk = self._disk()
+        found = {}
+        for key in keys:
+            if key in found:
+                continue
+            vector = self.memory.get(key)
+            if vector is None and disk is not None:
+                vector = disk.get(key)
+                if vector is not None:
+                    self.memory.put(key, vector)
+            if vector is not None:
+                found[key] = vector
+
+        # Encode each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            encoded = self.encoder.encode(list(missing.values()))
+            disk = self._disk(encoded.shape[1])
+            for key, vector in zip(missing, encoded):
+                vector = np.array(vector, dtype=np.float32)
+                found[key] = vector
+                self.memory.put(key, vector)
+                if disk is not None:
+                    disk.put(key, vector)
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def stats(self):
+        """Hit, miss and eviction counters per tier, plus the wrapped encoder's stats"""
+        stats = {'cache': {'memory': self.memory.stats()}}
+        if self.disk is not None:
+            stats['cache']['disk'] = self.disk.stats()
+        if hasattr(self.encoder, 'stats'):
+            stats.update(self.encoder.stats())
+        return stats
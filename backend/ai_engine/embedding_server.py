@@ -0,0 +1,161 @@
+"""
+Local embedding sidecar.
+
+One process owns the SentenceTransformer and serves encode requests over a
+Unix socket, so gunicorn workers can be scaled without each loading its own
+copy of the model. Requests that arrive close together are encoded as one
+batch.
+
+Wire format (all integers unsigned, network byte order):
+    request:  u32 length + JSON {"model": ..., "texts": [...]}
+    response: u32 rows + u32 dims + rows*dims float32 (little endian)
+    error:    u32 0xFFFFFFFF + u32 length + UTF-8 message
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ERROR_MARKER = 0xFFFFFFFF
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+
+class EmbeddingServerError(Exception):
+    pass
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError('Embedding server connection closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, model_name, max_batch_size=64, max_wait_ms=5):
+        self.model_name = model_name
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, _EncodeHandler)
+        os.chmod(socket_path, 0o660)
+
+        from .batching import BatchingEncoder
+        from .model_registry import registry, LocalEncoder
+        self.batcher = BatchingEncoder(
+            LocalEncoder(registry.warmup(model_name)),
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+        )
+
+    def encode(self, texts):
+        return self.batcher.encode(texts)
+
+
+class _EncodeHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        while True:
+            try:
+                (length,) = struct.unpack('!I', _recv_exactly(sock, 4))
+            except ConnectionError:
+                return
+
+            if length > MAX_REQUEST_BYTES:
+                # The payload is not read, so the stream cannot be resumed
+                self._send_error(sock, 'Request too large')
+                return
+
+            try:
+                payload = json.loads(_recv_exactly(sock, length).decode('utf-8'))
+                if payload.get('model') != self.server.model_name:
+                    raise EmbeddingServerError(f"Server does not serve model {payload.get('model')}")
+                embeddings = self.server.encode(payload['texts'])
+                rows, dims = embeddings.shape
+                sock.sendall(struct.pack('!II', rows, dims) + embeddings.astype('<f4').tobytes())
+            except OSError:
+                # Includes ConnectionError: the client is gone
+                return
+            except Exception as e:
+                self._send_error(sock, str(e))
+
+    @staticmethod
+    def _send_error(sock, message):
+        message = message.encode('utf-8')
+        try:
+            sock.sendall(struct.pack('!II', ERROR_MARKER, len(message)) + message)
+        except OSError:
+            pass
+
+
+class RemoteEncoder:
+    """Encoder client that forwards encode calls to an EmbeddingServer"""
+
+    def __init__(self, socket_path, model_name, timeout=60):
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self, timeout):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        sock.settimeout(timeout)
+        return sock
+
+    def _reset(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            sock.close()
+        self._local.sock = None
+
+    def encode(self, texts):
+        texts = list(texts)
+        payload = json.dumps({'model': self.model_name, 'texts': texts}).encode('utf-8')
+        if len(payload) > MAX_REQUEST_BYTES:
+            raise EmbeddingServerError('Request too large')
+
+        # One retry covers a connection the server closed while it sat idle, or
+        # a server restarting; a timeout is not retried (the server may still
+        # be encoding), and both attempts share the timeout
+        deadline = time.monotonic() + self.timeout
+        for attempt in range(2):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError('Embedding server did not respond in time')
+            try:
+                sock = self._connection(remaining)
+                sock.sendall(struct.pack('!I', len(payload)) + payload)
+                rows, dims = struct.unpack('!II', _recv_exactly(sock, 8))
+                if rows == ERROR_MARKER:
+                    message = _recv_exactly(sock, dims).decode('utf-8')
+                    raise EmbeddingServerError(message)
+                data = _recv_exactly(sock, rows * dims * 4)
+                return np.frombuffer(data, dtype='<f4').reshape(rows, dims).astype(np.float32)
+            except (ConnectionError, FileNotFoundError):
+                self._reset()
+                if attempt:
+                    raise
+            except Exception:
+                # Timeouts, error replies and malformed replies: the stream
+                # may be out of step, so the next call reconnects
+                self._reset()
+                raise
@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+
+class LocalEncoder:
+    """Encoder backed by a SentenceTransformer loaded in this process"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def encode(self, texts):
+        embeddings = self.model.encode(list(texts), convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of SentenceTransformer models.
+
+    Every SemanticMatcher shares the same loaded model instead of paying the
+    load on each request. Calling warmup() from the WSGI module while gunicorn
+    runs with --preload loads the model in the master process, so forked
+    workers share its memory pages copy-on-write.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._load_times = {}
+        self._warm = set()
+        self._encoders = {}
+        self._encoders_pid = os.getpid()
+        self._lock = threading.Lock()
+        self.server_socket = None
+        self.batching = False
+        self.max_batch_size = 64
+        self.max_wait_ms = 5
+        self.cache_size = 0
+        self.disk_cache_path = None
+        self.disk_cache_slots = 0
+
+    def configure(self, server_socket=None, batching=False, max_batch_size=64, max_wait_ms=5,
+                  cache_size=0, disk_cache_path=None, disk_cache_slots=200000):
+        """
+        Route encode calls to an embedding server instead of a local model,
+        micro-batch concurrent local encode calls, and/or put a content-addressed
+        cache (cache_size entries in memory, optionally backed by a shared file)
+        in front of every encode
+        """
+        self.server_socket = server_socket or None
+        self.batching = batching
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.cache_size = cache_size
+        self.disk_cache_path = disk_cache_path or None
+        self.disk_cache_slots = disk_cache_slots
+        self._encoders = {}
+
+    def get_encoder(self, model_name):
+        """
+        Return an object whose encode(texts) gives normalized float32 embeddings,
+        either from the local model or from the embedding server
+        """
+        if self._encoders_pid != os.getpid():
+            # Batching threads do not survive a fork; workers build their own encoders
+            self._encoders = {}
+            self._encoders_pid = os.getpid()
+
+        encoder = self._encoders.get(model_name)
+        if encoder is not None:
+            return encoder
+
+        with self._lock:
+            encoder = self._encoders.get(model_name)
+            if encoder is None:
+                encoder = self._create_encoder(model_name)
+                self._encoders[model_name] = encoder
+        return encoder
+
+    def _create_encoder(self, model_name):
+        if self.server_socket:
+            # The server batches requests itself
+            from .embedding_server import RemoteEncoder
+            encoder = RemoteEncoder(self.server_socket, model_name)
+        else:
+            encoder = LocalEncoder(self._load(model_name))
+            if self.batching:
+                from .batching import BatchingEncoder
+                encoder = BatchingEncoder(encoder, self.max_batch_size, self.max_wait_ms)
+
+        if self.cache_size:
+            from .embedding_cache import CachingEncoder
+            encoder = CachingEncoder(
+                encoder, model_name, self.cache_size, self.disk_cache_path, self.disk_cache_slots
+            )
+        return encoder
+
+    def get(self, model_name):
+        """Return the loaded model, loading it on first use"""
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            return self._load(model_name)
+
+    def _load(self, model_name):
+        # Caller holds self._lock
+        model = self._models.get(model_name)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            started = time.perf_counter()
+            model = SentenceTransformer(model_name)
+            self._load_times[model_name] = time.perf_counter() - started
+            self._models[model_name] = model
+        return model
+
+    def preload(self, model_name):
+        """
+        Load the model without running it, for a process that forks workers
+        afterwards (gunicorn --preload)
+
+        torch's intra-op thread pool does not survive a fork, and forked
+        workers can hang in their first encode if the parent started it. The
+        pool is started lazily by the first parallel operation, so the model
+        is built with torch limited to one thread; the workers share its
+        weights copy-on-write and start their own pool when they first encode.
+        """
+        import torch
+        threads = torch.get_num_threads()
+        torch.set_num_threads(1)
+        try:
+            return self.get(model_name)
+        finally:
+            torch.set_num_threads(threads)
+
+    def warmup(self, model_name):
+        """Load the model and run one encode so the first real request is fast"""
+        model = self.get(model_name)
+        model.encode(['warmup'], convert_to_numpy=True)
+        self._warm.add(model_name)
+        return model
+
+    def is_loaded(self, model_name):
+        return model_name in self._models
+
+    def is_warm(self, model_name):
+        return model_name in self._warm
+
+    def stats(self):
+        """Load time and warm state of every loaded model"""
+        stats = {}
+        if self.server_socket:
+            stats['server_socket'] = self.server_socket
+            for model_name, encoder in self._encoders.items():
+                if hasattr(encoder, 'stats'):
+                    stats[model_name] = encoder.stats()
+
+        for model_name in self._models:
+            stats[model_name] = {
+                'load_time_seconds': round(self._load_times.get(model_name, 0.0), 3),
+                'warm': model_name in self._warm,
+            }
+            encoder = self._encoders.get(model_name)
+            if hasattr(encoder, 'stats'):
+                stats[model_name].update(encoder.stats())
+        return stats
+
+
+registry = ModelRegistry()
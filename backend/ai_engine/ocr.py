@@ -0,0 +1,59 @@
+"""
+OCR for scanned resumes: page images prepared for Tesseract.
+
+Pages are converted to grayscale and downsampled to a target resolution
+before recognition; full-resolution colour scans take several times longer
+to recognize and are not read any better. Prepared pages travel as PNG
+bytes, so ResumeParser can OCR them one page per task in its process pool.
+"""
+import io
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageSequence
+
+# Long side of a US Letter page in inches: images without a usable DPI are
+# scaled down to at most this many inches at the target DPI
+PAGE_INCHES = 11
+
+
+def prepare_image(image, dpi):
+    """Grayscale copy of a PIL image, downsampled (never upscaled) to about dpi"""
+    source_dpi = image.info.get('dpi', (0, 0))[0]
+    image = image.convert('L')
+
+    scale = min(1.0, PAGE_INCHES * dpi / max(image.size))
+    if source_dpi and source_dpi > dpi:
+        scale = min(scale, dpi / source_dpi)
+    if scale < 1.0:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.Resampling.LANCZOS)
+    return image
+
+
+def to_png(image):
+    out = io.BytesIO()
+    image.save(out, format='PNG')
+    return out.getvalue()
+
+
+def image_pages(source, dpi, max_pages):
+    """Prepared pages (PNG bytes) of an image file: every frame of a multi-page TIFF, up to max_pages"""
+    pages = []
+    with Image.open(source) as image:
+        for frame in ImageSequence.Iterator(image):
+            if len(pages) == max_pages:
+                break
+            pages.append(to_png(prepare_image(frame, dpi)))
+    return pages
+
+
+def pdf_page_image(page, dpi):
+    """A PDF page rendered in grayscale at dpi, as PNG bytes"""
+    return page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY).tobytes('png')
+
+
+def ocr_page(data, timeout=0):
+    """Text of one prepared page; Tesseract is stopped after timeout seconds (0: no limit)"""
+    import pytesseract
+    with Image.open(io.BytesIO(data)) as image:
+        return pytesseract.image_to_string(image, timeout=timeout)
@@ -0,0 +1,64 @@
+"""
+Scalar int8 quantization of normalized embeddings.
+
+Each vector is stored as int8 codes plus one float32 scale
+(max |component| / 127), a quarter of the float32 size. Scoring scans the
+int8 matrix against the float query in cache-sized chunks, then re-ranks
+the best candidates with the original float vectors.
+"""
+import numpy as np
+
+
+def quantize(vectors):
+    """Return (codes, scales) for a 2-D float matrix"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def dequantize(codes, scales):
+    return codes.astype(np.float32) * scales[:, None]
+
+
+def quantized_scores(codes, scales, query, chunk_size=256):
+    """
+    Approximate dot products of every quantized row with a float query
+
+    Small chunks keep the float32 copy of each block in cache.
+    """
+    query = np.asarray(query, dtype=np.float32)
+    scores = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), chunk_size):
+        end = start + chunk_size
+        scores[start:end] = (codes[start:end].astype(np.float32) @ query) * scales[start:end]
+    return scores
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores, best first"""
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+def search_quantized(codes, scales, vectors, query, k, rerank_factor=4, skip=None):
+    """
+    Top-k rows by int8 scan plus float re-rank of the best k * rerank_factor
+
+    skip is an optional boolean mask of rows to leave out. Returns
+    (row_indices, float_scores), best first.
+    """
+    approx = quantized_scores(codes, scales, query)
+    if skip is not None:
+        approx[skip] = -np.inf
+    # Sorted rows keep reads from a memory-mapped float matrix sequential
+    candidates = np.sort(top_k(approx, k * rerank_factor))
+    if skip is not None:
+        candidates = candidates[~skip[candidates]]
+    exact = np.asarray(vectors[candidates], dtype=np.float32) @ np.asarray(query, dtype=np.float32)
+    best = top_k(exact, k)
+    return candidates[best], exact[best]
@@ -1,154 +1,383 @@
+import io
+import math
 import re
 import os
+import threading
+import time
+import multiprocessing
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 import fitz  # PyMuPDF
 from docx import Document
+from .skill_extractor import get_skill_matcher
+from .skill_taxonomy import get_taxonomy
+from .resume_text import ResumeText
+
+# Bump whenever a change to the parser changes its output for the same file,
+# so parse results cached under the old version are not reused.
+PARSER_VERSION = 5
+
+# Default extraction limits; ResumeParser(limits=...) overrides them
+LIMITS = {
+    'max_bytes': 10 * 2**20,  # larger files are rejected
+    'max_pages': 50,  # later PDF pages are ignored
+    'timeout': 30.0,  # seconds for the text extraction of one PDF
+    'parallel_pages': 20,  # PDFs with at least this many pages use the process pool
+    'workers': 4,
+    'ocr_dpi': 300,  # scanned pages are OCRed in grayscale at this resolution
+    'ocr_page_timeout': 20.0,  # seconds of OCR per page; slower pages are left empty
+}
+
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_RE = re.compile(r'[\+\(]?[1-9][0-9 .\-\(\)]{8,}[0-9]')
+# Matched against ResumeText.lower
+DEGREE_RE = re.compile('|'.join(re.escape(degree) for degree in
+                                ['bachelor', 'master', 'phd', 'b.tech', 'm.tech', 'mba', 'b.sc', 'm.sc']))
+CERTIFICATION_RE = re.compile('certified|certification|certificate')
+PERIOD_RE = re.compile(r'(\d{4})\s*[-–]\s*(\d{4}|Present|Current)', re.IGNORECASE)
+
+_pool = None
+# Parses currently using each pool, including retired ones
+_pool_users = {}
+_pool_lock = threading.Lock()
+# ResumeParser of this process for parse_file(), by skills file and limits
+_parsers = {}
+
+
+class ParseLimitError(Exception):
+    """The file is over one of the extraction limits"""
+
+
+@contextmanager
+def _lease_pool(workers):
+    """
+    The shared process pool for page extraction and OCR, for one parse
+
+    A pool retired meanwhile has its workers terminated once the last parse
+    using it is done, so other parses never lose their futures to it.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, as the caller may be multi-threaded
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        pool = _pool
+        _pool_users[pool] = _pool_users.get(pool, 0) + 1
+    try:
+        yield pool
+    finally:
+        with _pool_lock:
+            _pool_users[pool] -= 1
+            finished = pool is not _pool and not _pool_users[pool]
+            if finished:
+                del _pool_users[pool]
+        if finished:
+            _terminate_pool(pool)
+
+
+def _retire_pool(pool, futures=()):
+    """
+    Stop handing out a broken pool, or one whose workers are stuck on
+    timed-out pages, and cancel the caller's own unstarted futures; the
+    next parse starts a new pool
+    """
+    global _pool
+    for future in futures:
+        future.cancel()
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def _terminate_pool(pool):
+    """Kill the worker processes of a retired pool (shutdown() alone would wait for stuck pages)"""
+    processes = list((pool._processes or {}).values())
+    for process in processes:
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.join(timeout=1)
+
+
+def parser_version(skills_file=None, limits=None):
+    """Everything a parse result depends on besides the file: code, skill taxonomy, page limit and OCR resolution"""
+    limits = {**LIMITS, **(limits or {})}
+    return f'{PARSER_VERSION}:{get_taxonomy(skills_file).fingerprint}:{limits["max_pages"]}:{limits["ocr_dpi"]}'
+
+
+def _open_pdf(source):
+    """Open a PDF from a path or from bytes-like data (read in place, without a copy)"""
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype='pdf')
+
+
+def _extract_page_range(source, start, stop):
+    """Text of pages [start, stop) of a PDF; runs in the page pool"""
+    with _open_pdf(source) as doc:
+        return [doc[number].get_text() for number in range(start, stop)]
+
+
+def parse_file(source, file_name=None, skills_file=None, limits=None):
+    """
+    Parse one resume with a ResumeParser reused across calls in this process
+
+    Entry point for pools of parser processes (e.g. bulk uploads): spawned
+    workers do not inherit the configured taxonomy, so pass skills_file.
+    """
+    key = (skills_file, tuple(sorted((limits or {}).items())))
+    parser = _parsers.get(key)
+    if parser is None:
+        parser = _parsers[key] = ResumeParser(skills_file, limits)
+    return parser.parse_resume(source, file_name)
+
+
 class ResumeParser:
-    def __init__(self):
+    def __init__(self, skills_file=None, limits=None):
+        self.skill_matcher = get_skill_matcher(skills_file)
+        self.limits = {**LIMITS, **(limits or {})}
         try:
             import spacy
             self.nlp = spacy.load('en_core_web_sm')
         except:
             self.nlp = None
     
-    def parse_resume(self, file_path):
-        """Parse resume and extract structured data"""
-        ext = os.path.splitext(file_path)[1].lower()
+    def parse_resume(self, source, file_name=None):
+        """
+        Parse resume and extract structured data
+        
+        source is a file path, the file's contents (bytes, bytearray or
+        memoryview) or a binary file-like object. In-memory sources are
+        parsed without writing them to disk; file_name (default: the
+        stream's name) tells their type.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            file_name = os.fspath(source)
+            size = os.path.getsize(source)
+        else:
+            if hasattr(source, 'read'):
+                file_name = file_name or getattr(source, 'name', '')
+                source = source.read()
+            source = memoryview(source)
+            size = source.nbytes
+        ext = os.path.splitext(file_name or '')[1].lower()
+        
+        if size > self.limits['max_bytes']:
+            raise ParseLimitError(f'File is {size} bytes; the limit is {self.limits["max_bytes"]}')
         
         if ext == '.pdf':
-            text = self._extract_pdf(file_path)
+            text = self._extract_pdf(source)
         elif ext in ['.docx', '.doc']:
-            text = self._extract_docx(file_path)
+            text = self._extract_docx(source)
         else:
             # Try OCR for images
-            text = self._extract_with_ocr(file_path)
+            text = self._extract_with_ocr(source)
         
         return self._extract_information(text)
     
-    def _extract_pdf(self, file_path):
-        """Extract text from PDF"""
-        text = ""
-        with fitz.open(file_path) as doc:
-            for page in doc:
-                text += page.get_text()
-        return text
+    @staticmethod
+    def _as_file(source):
+        """A path as is; in-memory data wrapped for libraries that want a file"""
+        if isinstance(source, (str, os.PathLike)):
+            return source
+        return io.BytesIO(source)
+    
+    def _extract_pdf(self, source):
+        """
+        Extract text from the first max_pages pages of a PDF
+        
+        Long documents are split into page ranges extracted in the process
+        pool and stitched back in page order. Raises ParseLimitError if the
+        extraction takes longer than the timeout. Pages without a text layer
+        (scans) are OCRed afterwards.
+        """
+        deadline = time.monotonic() + self.limits['timeout']
+        pages = None
+        with _open_pdf(source) as doc:
+            page_count = min(doc.page_count, self.limits['max_pages'])
+            if page_count < self.limits['parallel_pages'] or self.limits['workers'] < 2:
+                pages = []
+                for number in range(page_count):
+                    if time.monotonic() > deadline:
+                        raise ParseLimitError(f'PDF text extraction timed out after {number} pages')
+                    pages.append(doc[number].get_text())
+        
+        if pages is None:
+            pages = self._extract_pdf_parallel(source, page_count, deadline)
+        blank = [number for number, text in enumerate(pages) if not text.strip()]
+        if blank:
+            for number, text in self._ocr_pdf_pages(source, blank).items():
+                pages[number] = text
+        return "".join(pages)
+    
+    def _extract_pdf_parallel(self, source, page_count, deadline):
+        """
+        Page texts in order, two page ranges per pool worker
+        
+        In-memory PDFs are sent to the workers with each range, so they get
+        one range per worker instead.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            chunks = min(page_count, self.limits['workers'] * 2)
+        else:
+            source = bytes(source)
+            chunks = min(page_count, self.limits['workers'])
+        bounds = [page_count * i // chunks for i in range(chunks + 1)]
+        
+        with _lease_pool(self.limits['workers']) as pool:
+            futures = [pool.submit(_extract_page_range, source, start, stop)
+                       for start, stop in zip(bounds, bounds[1:])]
+            pages = []
+            try:
+                for future in futures:
+                    pages.extend(future.result(timeout=max(deadline - time.monotonic(), 0)))
+            except FutureTimeoutError:
+                _retire_pool(pool, futures)
+                raise ParseLimitError(f'PDF text extraction timed out after {len(pages)} pages')
+            except BrokenProcessPool:
+                _retire_pool(pool, futures)
+                raise
+        return pages
     
-    def _extract_docx(self, file_path):
+    def _extract_docx(self, source):
         """Extract text from DOCX"""
-        doc = Document(file_path)
+        doc = Document(self._as_file(source))
         return "\n".join([para.text for para in doc.paragraphs])
     
-    def _extract_with_ocr(self, file_path):
-        """Extract text using OCR (Tesseract)"""
+    def _extract_with_ocr(self, source):
+        """Extract text from an image, or every page of a multi-page TIFF, using OCR (Tesseract)"""
         try:
-            import pytesseract
-            from PIL import Image
-            img = Image.open(file_path)
-            return pytesseract.image_to_string(img)
-        except:
+            from .ocr import image_pages
+            pages = image_pages(self._as_file(source), self.limits['ocr_dpi'], self.limits['max_pages'])
+        except Exception:
+            # Not an image, or the OCR libraries are not installed
             return ""
+        return "\n".join(self._ocr_pages(pages, len(pages)))
+    
+    def _ocr_pdf_pages(self, source, numbers):
+        """{page number: OCR text} for the PDF pages among numbers that have images"""
+        try:
+            from .ocr import pdf_page_image
+        except ImportError:
+            return {}
+        with _open_pdf(source) as doc:
+            scanned = [number for number in numbers if doc[number].get_images()]
+            images = (pdf_page_image(doc[number], self.limits['ocr_dpi']) for number in scanned)
+            return dict(zip(scanned, self._ocr_pages(images, len(scanned))))
+    
+    def _ocr_pages(self, images, count):
+        """
+        OCR text of `count` prepared page images, in order
+        
+        Several pages are OCRed in the process pool, a few pages ahead of the
+        one being collected. Each page gets ocr_page_timeout seconds;
+        pages that time out or fail come back empty, so the rest of the
+        document is still read.
+        """
+        from .ocr import ocr_page
+        timeout = self.limits['ocr_page_timeout']
+        workers = self.limits['workers']
+        texts = []
+        
+        if count < 2 or workers < 2:
+            for image in images:
+                try:
+                    texts.append(ocr_page(image, timeout))
+                except Exception:
+                    texts.append('')
+            return texts
+        
+        images = iter(images)
+        pending = deque()
+        # Tesseract is stopped after each page's timeout in the workers; this
+        # only catches workers that hang outside it
+        deadline = time.monotonic() + timeout * math.ceil(count / workers) + 5 if timeout else None
+        with _lease_pool(workers) as pool:
+            while True:
+                while len(pending) < workers * 2:
+                    image = next(images, None)
+                    if image is None:
+                        break
+                    pending.append(pool.submit(ocr_page, image, timeout))
+                if not pending:
+                    return texts
+                
+                future = pending.popleft()
+                try:
+                    texts.append(future.result(timeout=max(deadline - time.monotonic(), 0) if deadline else None))
+                except FutureTimeoutError:
+                    _retire_pool(pool, [future, *pending])
+                    return texts + [''] * (count - len(texts))
+                except BrokenProcessPool:
+                    _retire_pool(pool, pending)
+                    raise
+                except Exception:
+                    texts.append('')
     
     def _extract_information(self, text):
         """Extract structured information from text"""
+        doc = ResumeText(text)
         data = {
             'raw_text': text,
-            'name': self._extract_name(text),
-            'email': self._extract_email(text),
-            'phone': self._extract_phone(text),
-            'skills': self._extract_skills(text),
-            'education': self._extract_education(text),
-            'experience': self._extract_experience(text),
-            'certifications': self._extract_certifications(text),
+            'name': self._extract_name(doc),
+            'email': self._extract_email(doc),
+            'phone': self._extract_phone(doc),
+            'skills': self._extract_skills(doc),
+            'education': self._extract_education(doc),
+            'experience': self._extract_experience(doc),
+            'certifications': self._extract_certifications(doc),
         }
         return data
     
-    def _extract_name(self, text):
+    def _extract_name(self, doc):
         """Extract name from resume"""
-        lines = text.split('\n')
-        for line in lines[:5]:
+        for line in doc.lines[:5]:
             line = line.strip()
             if len(line) > 3 and len(line) < 50 and not '@' in line:
                 return line
         return ""
     
-    def _extract_email(self, text):
+    def _extract_email(self, doc):
         """Extract email using regex"""
-        pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        match = re.search(pattern, text)
+        match = EMAIL_RE.search(doc.text)
         return match.group(0) if match else ""
     
-    def _extract_phone(self, text):
+    def _extract_phone(self, doc):
         """Extract phone number"""
-        pattern = r'[\+\(]?[1-9][0-9 .\-\(\)]{8,}[0-9]'
-        match = re.search(pattern, text)
+        match = PHONE_RE.search(doc.text)
         return match.group(0) if match else ""
     
-    def _extract_skills(self, text):
-        """Extract skills"""
-        common_skills = [
-            'python', 'java', 'javascript', 'react', 'django', 'flask', 'sql', 'mysql',
-            'postgresql', 'mongodb', 'aws', 'docker', 'kubernetes', 'git', 'html', 'css',
-            'node.js', 'express', 'angular', 'vue', 'typescript', 'c++', 'c#', 'ruby',
-            'php', 'swift', 'kotlin', 'go', 'rust', 'scala', 'r', 'matlab', 'tensorflow',
-            'pytorch', 'scikit-learn', 'pandas', 'numpy', 'machine learning', 'deep learning',
-            'nlp', 'computer vision', 'data science', 'data analysis', 'agile', 'scrum'
-        ]
-        
-        text_lower = text.lower()
-        found_skills = []
-        
-        for skill in common_skills:
-            if skill in text_lower:
-                found_skills.append(skill)
-        
-        return found_skills
+    def _extract_skills(self, doc):
+        """Extract skills from the configured skill list"""
+        return self.skill_matcher.extract(doc.text)
     
-    def _extract_education(self, text):
+    def _extract_education(self, doc):
         """Extract education information"""
-        education = []
-        degrees = ['bachelor', 'master', 'phd', 'b.tech', 'm.tech', 'mba', 'b.sc', 'm.sc']
-        
-        lines = text.split('\n')
-        for i, line in enumerate(lines):
-            line_lower = line.lower()
-            for degree in degrees:
-                if degree in line_lower:
-                    education.append({
-                        'degree': line.strip(),
-                        'context': ' '.join(lines[max(0, i-1):min(len(lines), i+2)])
-                    })
-                    break
-        
-        return education
+        return [
+            {
+                'degree': doc.lines[i].strip(),
+                'context': ' '.join(doc.lines[max(0, i-1):min(len(doc), i+2)])
+            }
+            for i in doc.matching_lines(DEGREE_RE)
+        ]
     
-    def _extract_experience(self, text):
+    def _extract_experience(self, doc):
         """Extract work experience"""
         experience = []
         
-        # Look for year patterns (2019-2021, 2019 - Present, etc.)
-        pattern = r'(\d{4})\s*[-–]\s*(\d{4}|Present|Current)'
-        matches = re.finditer(pattern, text, re.IGNORECASE)
-        
-        for match in matches:
-            start_pos = max(0, match.start() - 200)
-            end_pos = min(len(text), match.end() + 200)
-            context = text[start_pos:end_pos]
-            
-            experience.append({
-                'period': match.group(0),
-                'context': context.strip()
-            })
+        # Look for year patterns (2019-2021, 2019 - Present, etc.), which may
+        # wrap onto the next line; the context is the line before (usually
+        # the role) and the two after
+        for match in PERIOD_RE.finditer(doc.text):
+            first, last = doc.line_at(match.start()), doc.line_at(match.end() - 1)
+            context = ' '.join(doc.lines[max(0, first-1):min(len(doc), last+3)]).strip()
+            experience.append({'period': match.group(0), 'context': context})
         
         return experience
     
-    def _extract_certifications(self, text):
+    def _extract_certifications(self, doc):
         """Extract certifications"""
-        certifications = []
-        cert_keywords = ['certified', 'certification', 'certificate']
-        
-        lines = text.split('\n')
-        for line in lines:
-            line_lower = line.lower()
-            if any(keyword in line_lower for keyword in cert_keywords):
-                certifications.append(line.strip())
-        
-        return certifications
+        return [doc.lines[i].strip() for i in doc.matching_lines(CERTIFICATION_RE)]
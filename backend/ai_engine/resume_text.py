@@ -0,0 +1,47 @@
+"""
+Resume text split into lines once, for all ResumeParser extractors.
+
+The text is tokenized into lines in a single pass, keeping each line's start
+offset, and lowercased once into a view with the same offsets. Extractors run
+one precompiled regex over the whole text (or the lowercase view) and map
+matches back to lines with line_at(), instead of splitting, lowercasing and
+re-scanning the text themselves.
+"""
+import bisect
+
+
+class ResumeText:
+    def __init__(self, text):
+        self.text = text
+        self.lines = text.split('\n')
+        self.offsets = []
+        offset = 0
+        for line in self.lines:
+            self.offsets.append(offset)
+            offset += len(line) + 1
+
+        self.lower = text.lower()
+        if len(self.lower) != len(text):
+            # A few characters lowercase to two ('İ'); leave those as they are
+            # so offsets in the lowercase view match the text
+            self.lower = ''.join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def line_at(self, offset):
+        """Index of the line containing a character offset of the text"""
+        return bisect.bisect_right(self.offsets, offset) - 1
+
+    def matching_lines(self, pattern):
+        """Indexes of the lines where a compiled lowercase pattern matches the lowercase view, in order"""
+        found = []
+        match = pattern.search(self.lower)
+        while match is not None:
+            line = self.line_at(match.start())
+            found.append(line)
+            if line + 1 == len(self.lines):
+                break
+            # The rest of this line cannot add anything
+            match = pattern.search(self.lower, self.offsets[line + 1])
+        return found
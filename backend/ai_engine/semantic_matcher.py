@@ -1,39 +1,69 @@
+import hashlib
+import heapq
+import math
+import time
+
+import numpy as np
+
+from .skill_taxonomy import get_taxonomy
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Bump whenever _prepare_resume_text/_prepare_job_text change, so stored
+# embeddings computed from the old text layout are treated as stale.
+EMBEDDING_VERSION = 1
+
+
 class SemanticMatcher:
+    model_name = MODEL_NAME
+    embedding_version = EMBEDDING_VERSION
+
     def __init__(self):
         self._model = None
-        self._util = None
 
     def _ensure_model(self):
-        if self._model is None or self._util is None:
-            from sentence_transformers import SentenceTransformer, util
-            self._model = SentenceTransformer('all-MiniLM-L6-v2')
-            self._util = util
+        if self._model is None:
+            from .model_registry import registry
+            self._model = registry.get_encoder(self.model_name)
+    
+    def encode(self, texts):
+        """Encode a list of texts into L2-normalized float32 vectors (one row per text)"""
+        self._ensure_model()
+        return self._model.encode(list(texts))
+    
+    def text_hash(self, text):
+        """Hash of the embedded text, scoped to the model and text layout version"""
+        key = f"{self.model_name}:{self.embedding_version}:{text}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+    
+    def embed_resume(self, resume_data):
+        """Embed a resume, returning (vector, text_hash)"""
+        text = self._prepare_resume_text(resume_data)
+        return self.encode([text])[0], self.text_hash(text)
+    
+    def embed_job(self, job_data):
+        """Embed a job, returning (vector, text_hash)"""
+        text = self._prepare_job_text(job_data)
+        return self.encode([text])[0], self.text_hash(text)
     
-    def match_resume_to_job(self, resume_data, job_data):
+    def match_resume_to_job(self, resume_data, job_data, resume_embedding=None, job_embedding=None, skills=None):
         """
         Match resume to job using semantic similarity
         Returns match score, matched keywords, missing skills, and explainability data
-        """
-        # Prepare texts
-        resume_text = self._prepare_resume_text(resume_data)
-        job_text = self._prepare_job_text(job_data)
         
-        self._ensure_model()
-
-        # Compute embeddings
-        resume_embedding = self._model.encode(resume_text, convert_to_tensor=True)
-        job_embedding = self._model.encode(job_text, convert_to_tensor=True)
+        Pre-computed (normalized) embeddings can be passed in to skip encoding,
+        in which case the similarity is a single dot product. Likewise a
+        pre-computed (matched_skills, missing_skills) pair, e.g. from skill bitmaps.
+        """
+        if resume_embedding is None:
+            resume_embedding, _ = self.embed_resume(resume_data)
+        if job_embedding is None:
+            job_embedding, _ = self.embed_job(job_data)
         
-        # Compute similarity
-        similarity = self._util.cos_sim(resume_embedding, job_embedding).item()
-        match_percentage = round(similarity * 100, 2)
+        match_percentage = float(self.match_percentages([resume_embedding], [job_embedding])[0])
         
         # Extract matched and missing skills
-        resume_skills = set(skill.lower() for skill in resume_data.get('skills', []))
-        job_skills = set(skill.lower() for skill in job_data.get('required_skills', []))
-        
-        matched_skills = list(resume_skills & job_skills)
-        missing_skills = list(job_skills - resume_skills)
+        matched_skills, missing_skills = skills or self.compare_skills(resume_data, job_data)
         
         # Generate explainability heatmap
         heatmap = self._generate_heatmap(resume_data, job_data)
@@ -46,6 +76,23 @@ class SemanticMatcher:
             'recommendation': self._generate_recommendation(match_percentage, missing_skills)
         }
     
+    def match_percentages(self, resume_embeddings, job_embeddings):
+        """Match percentage of each (resume, job) row pair of two embedding matrices"""
+        resume_embeddings = np.asarray(resume_embeddings, dtype=np.float32)
+        job_embeddings = np.asarray(job_embeddings, dtype=np.float32)
+        # Both vectors are normalized, so the dot product is the cosine similarity
+        similarities = np.einsum('ij,ij->i', resume_embeddings, job_embeddings)
+        return np.round(similarities.astype(np.float64) * 100, 2)
+    
+    def compare_skills(self, resume_data, job_data):
+        """Return (matched_skills, missing_skills) for a resume against a job, by canonical skill"""
+        taxonomy = get_taxonomy()
+        resume_skills = set(taxonomy.canonicalize(resume_data.get('skills', [])))
+        job_skills = taxonomy.canonicalize(job_data.get('required_skills', []))
+        
+        return ([skill for skill in job_skills if skill in resume_skills],
+                [skill for skill in job_skills if skill not in resume_skills])
+    
     def _prepare_resume_text(self, resume_data):
         """Prepare resume text for embedding"""
         parts = []
@@ -100,22 +147,23 @@ class SemanticMatcher:
                     'type': 'experience'
                 })
         
-        # Compute similarity between each resume section and job requirement
-        for req in job_requirements[:5]:  # Limit to top 5 requirements
-            req_embedding = self._model.encode(req, convert_to_tensor=True)
-            
-            best_match = None
-            best_score = 0
-            
-            for section in resume_sections:
-                section_embedding = self._model.encode(section['text'], convert_to_tensor=True)
-                score = self._util.cos_sim(req_embedding, section_embedding).item()
-                
-                if score > best_score:
-                    best_score = score
-                    best_match = section
+        job_requirements = job_requirements[:5]  # Limit to top 5 requirements
+        
+        if not job_requirements or not resume_sections:
+            return heatmap
+        
+        # Two batched encodes and one similarity matrix (requirements x sections)
+        req_embeddings = self.encode(job_requirements)
+        section_embeddings = self.encode([section['text'] for section in resume_sections])
+        scores = req_embeddings @ section_embeddings.T
+        
+        best_indices = scores.argmax(axis=1)
+        
+        for req, best_index, row in zip(job_requirements, best_indices, scores):
+            best_score = float(row[best_index])
+            best_match = resume_sections[best_index]
             
-            if best_match and best_score > 0.3:
+            if best_score > 0.3:
                 heatmap.append({
                     'job_requirement': req,
                     'resume_fragment': best_match['text'][:150],
@@ -136,20 +184,171 @@ class SemanticMatcher:
         else:
             return "Low match. Consider other opportunities or extensive upskilling."
     
-    def rank_candidates(self, candidates_data, job_data):
-        """Rank multiple candidates for a job"""
-        rankings = []
+    def rank_candidates(self, candidates_data, job_data, job_embedding=None, top_k=None, batch_size=256):
+        """
+        Rank multiple candidates for a job
+        
+        The job is encoded once; candidates without a stored 'embedding' are
+        encoded in chunks of batch_size. All candidates are scored with one
+        matrix product and only the top_k (all, if None) are returned.
+        """
+        if not candidates_data:
+            return []
+        
+        if job_embedding is None:
+            job_embedding, _ = self.embed_job(job_data)
         
-        for candidate in candidates_data:
-            match_result = self.match_resume_to_job(candidate['resume_data'], job_data)
+        candidate_embeddings = np.empty((len(candidates_data), len(job_embedding)), dtype=np.float32)
+        
+        pending = []
+        for index, candidate in enumerate(candidates_data):
+            if candidate.get('embedding') is not None:
+                candidate_embeddings[index] = candidate['embedding']
+            else:
+                pending.append(index)
+        
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            texts = [self._prepare_resume_text(candidates_data[index]['resume_data']) for index in chunk]
+            candidate_embeddings[chunk] = self.encode(texts)
+        
+        scores = candidate_embeddings @ np.asarray(job_embedding, dtype=np.float32)
+        
+        if top_k is None or top_k >= len(scores):
+            top_indices = np.argsort(-scores, kind='stable')
+        else:
+            top_indices = heapq.nlargest(top_k, range(len(scores)), key=scores.__getitem__)
+        
+        rankings = []
+        for index in top_indices:
+            candidate = candidates_data[index]
+            matched_skills, missing_skills = self.compare_skills(candidate['resume_data'], job_data)
             rankings.append({
                 'candidate_id': candidate['id'],
-                'match_percentage': match_result['match_percentage'],
-                'matched_skills': match_result['matched_skills'],
-                'missing_skills': match_result['missing_skills']
+                'match_percentage': round(float(scores[index]) * 100, 2),
+                'matched_skills': matched_skills,
+                'missing_skills': missing_skills
             })
         
-        # Sort by match percentage
-        rankings.sort(key=lambda x: x['match_percentage'], reverse=True)
-        
         return rankings
+    
+    def cascade_match(self, resumes, jobs, shortlist_size=10, keep_fraction=0.2,
+                      resume_embedder=None, job_embedder=None):
+        """
+        Match every resume against every job in three stages, each on fewer pairs
+        
+        1. skill overlap: the share of each job's required skills the resume
+           has, for all pairs at once as one matrix product over a skill
+           vocabulary. The best keep_fraction of pairs (at least
+           shortlist_size) advance; jobs without required skills always do.
+        2. embedding similarity for the advancing pairs; resumes and jobs
+           without an 'embedding' are encoded in one batch. The best
+           shortlist_size pairs advance.
+        3. skills, heatmap and recommendation for the shortlist.
+        
+        resumes are dicts with 'id', 'resume_data' and optionally 'embedding';
+        jobs likewise with 'job_data'. resume_embedder/job_embedder can replace
+        stage 2's lookup: called with the advancing dicts, they return their
+        embedding matrix (e.g. from stored embeddings). Returns (matches, stats): match dicts
+        (as from match_resume_to_job, plus 'resume_id' and 'job_id'), best
+        first, and per-stage pair counts and timings.
+        """
+        stats = {'pairs': len(resumes) * len(jobs), 'stages': []}
+        
+        def record(stage, pairs_in, pairs_out, started):
+            stats['stages'].append({
+                'stage': stage,
+                'pairs_in': pairs_in,
+                'pairs_out': pairs_out,
+                'ms': round((time.perf_counter() - started) * 1000, 2),
+            })
+        
+        if not resumes or not jobs:
+            return [], stats
+        
+        # Stage 1: skill overlap
+        started = time.perf_counter()
+        taxonomy = get_taxonomy()
+        required_skills = [taxonomy.canonicalize(job['job_data'].get('required_skills', [])) for job in jobs]
+        vocabulary = {}
+        for skills in required_skills:
+            for skill in skills:
+                vocabulary.setdefault(skill, len(vocabulary))
+        
+        resume_skills = np.zeros((len(resumes), len(vocabulary)), dtype=np.float32)
+        for row, resume in enumerate(resumes):
+            for skill in taxonomy.canonicalize(resume['resume_data'].get('skills', [])):
+                column = vocabulary.get(skill)
+                if column is not None:
+                    resume_skills[row, column] = 1.0
+        job_skills = np.zeros((len(jobs), len(vocabulary)), dtype=np.float32)
+        for row, skills in enumerate(required_skills):
+            for skill in skills:
+                job_skills[row, vocabulary[skill]] = 1.0
+        
+        required = job_skills.sum(axis=1)
+        overlap = (resume_skills @ job_skills.T) / np.maximum(required, 1.0)
+        # Nothing to prefilter on: let the embeddings decide
+        overlap[:, required == 0] = np.inf
+        
+        overlap = overlap.ravel()
+        keep = min(len(overlap), max(shortlist_size, math.ceil(keep_fraction * len(overlap))))
+        if keep < len(overlap):
+            pairs = np.argpartition(-overlap, keep - 1)[:keep]
+        else:
+            pairs = np.arange(len(overlap))
+        resume_rows, job_rows = np.divmod(pairs, len(jobs))
+        record('skill_overlap', len(overlap), len(pairs), started)
+        
+        # Stage 2: embedding similarity
+        started = time.perf_counter()
+        advancing_resumes = [resumes[row] for row in np.unique(resume_rows)]
+        advancing_jobs = [jobs[row] for row in np.unique(job_rows)]
+        if resume_embedder is not None:
+            resume_embeddings = np.asarray(resume_embedder(advancing_resumes), dtype=np.float32)
+        else:
+            resume_embeddings = self._embedding_matrix(advancing_resumes, self._prepare_resume_text, 'resume_data')
+        if job_embedder is not None:
+            job_embeddings = np.asarray(job_embedder(advancing_jobs), dtype=np.float32)
+        else:
+            job_embeddings = self._embedding_matrix(advancing_jobs, self._prepare_job_text, 'job_data')
+        resume_lookup = {row: index for index, row in enumerate(np.unique(resume_rows))}
+        job_lookup = {row: index for index, row in enumerate(np.unique(job_rows))}
+        percentages = self.match_percentages(
+            resume_embeddings[[resume_lookup[row] for row in resume_rows]],
+            job_embeddings[[job_lookup[row] for row in job_rows]],
+        )
+        
+        shortlist = heapq.nlargest(shortlist_size, range(len(pairs)), key=percentages.__getitem__)
+        record('embedding', len(pairs), len(shortlist), started)
+        
+        # Stage 3: explanations for the shortlist only
+        started = time.perf_counter()
+        matches = []
+        for index in shortlist:
+            resume = resumes[resume_rows[index]]
+            job = jobs[job_rows[index]]
+            match_percentage = float(percentages[index])
+            matched_skills, missing_skills = self.compare_skills(resume['resume_data'], job['job_data'])
+            matches.append({
+                'resume_id': resume['id'],
+                'job_id': job['id'],
+                'match_percentage': match_percentage,
+                'matched_skills': matched_skills,
+                'missing_skills': missing_skills,
+                'heatmap': self._generate_heatmap(resume['resume_data'], job['job_data']),
+                'recommendation': self._generate_recommendation(match_percentage, missing_skills)
+            })
+        record('heatmap', len(shortlist), len(matches), started)
+        
+        return matches, stats
+    
+    def _embedding_matrix(self, items, prepare_text, data_key):
+        """Stack the items' 'embedding's, encoding the ones without one in a single batch"""
+        missing = [index for index, item in enumerate(items) if item.get('embedding') is None]
+        encoded = self.encode([prepare_text(items[index][data_key]) for index in missing]) if missing else []
+        
+        vectors = [item.get('embedding') for item in items]
+        for index, vector in zip(missing, encoded):
+            vectors[index] = vector
+        return np.asarray(vectors, dtype=np.float32)
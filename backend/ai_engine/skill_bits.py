@@ -0,0 +1,85 @@
+"""
+Skill sets as integer bitmaps.
+
+Every skill in the vocabulary has a small integer id; a set of skills is a
+Python int with bit `id` set for each member, stored as little-endian bytes.
+Intersections, differences and overlap counts are then single bitwise
+operations instead of building and comparing sets of strings.
+
+Names are resolved through the skill taxonomy first, so aliases of a skill
+('js', 'ecmascript') share the canonical skill's id.
+"""
+from .skill_taxonomy import canonical_skill
+
+
+def normalize(name):
+    return canonical_skill(name)
+
+
+def to_bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def from_bytes(data):
+    return int.from_bytes(bytes(data or b''), 'little')
+
+
+def popcount(bits):
+    return bits.bit_count()
+
+
+def bit_ids(bits):
+    """Ids of the set bits, ascending"""
+    ids = []
+    while bits:
+        low = bits & -bits
+        ids.append(low.bit_length() - 1)
+        bits ^= low
+    return ids
+
+
+class SkillVocabulary:
+    """Bidirectional skill name <-> id mapping"""
+
+    def __init__(self, names_by_id=None):
+        self._ids = {}
+        self._names = {}
+        for skill_id, name in (names_by_id or {}).items():
+            self.add(skill_id, name)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, name):
+        return normalize(name) in self._ids
+
+    def add(self, skill_id, name):
+        """Register a stored skill; name is used as stored (already canonical when it was created)"""
+        self._ids[name] = skill_id
+        self._names[skill_id] = name
+
+    def has_id(self, skill_id):
+        return skill_id in self._names
+
+    def id_for(self, name):
+        return self._ids.get(normalize(name))
+
+    def unknown(self, names):
+        """Normalized names that have no id yet"""
+        return {normalize(name) for name in names if normalize(name) not in self._ids}
+
+    def bits(self, names):
+        """Bitmap of the known names; unknown names are ignored"""
+        bits = 0
+        for name in names:
+            skill_id = self._ids.get(normalize(name))
+            if skill_id is not None:
+                bits |= 1 << skill_id
+        return bits
+
+    def names(self, bits):
+        return [self._names[skill_id] for skill_id in bit_ids(bits) if skill_id in self._names]
+
+    def compare(self, resume_bits, job_bits):
+        """Return (matched_skills, missing_skills) of a resume bitmap against a job bitmap"""
+        return self.names(resume_bits & job_bits), self.names(job_bits & ~resume_bits)
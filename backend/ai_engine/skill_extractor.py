@@ -0,0 +1,155 @@
+"""
+Single-pass skill extraction.
+
+The skill list is compiled once into an Aho-Corasick automaton, so finding
+every skill in a resume costs one walk over the text however many skills
+there are. Matching is case-insensitive, treats any run of whitespace as a
+single space, and only accepts a match that is not glued to a neighbouring
+letter or digit ('r' does not match inside 'docker', 'go' not inside 'google').
+Overlapping matches resolve leftmost-longest ('machine learning' wins over
+'learning'). Aliases from the skill taxonomy are matched too and reported
+under their canonical name ('JS' is found as 'javascript'), except that
+names the taxonomy marks as everyday words only match as written ('Rust',
+not 'rust'), and names of one or two letters ('r', 'go') only match as an
+item of a list: "Skills: Go, R" or a bullet, not "R&D", "John R. Smith" or
+"Go the extra mile".
+"""
+import functools
+
+from .skill_taxonomy import SkillTaxonomy, get_taxonomy
+
+
+# What may come before and after a short name for it to be a list item
+LIST_BEFORE = ',;:|/(*-\u2022\u00b7\n\r'
+LIST_AFTER = ',;|/)\n\r'
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+def _is_short(name):
+    return len(name) <= 2 and name.isalpha()
+
+
+def _in_list(text, start, end):
+    """Whether text[start:end] stands alone as an item of a list"""
+    before = start - 1
+    while before >= 0 and text[before] in ' \t':
+        before -= 1
+    after = end
+    while after < len(text) and text[after] in ' \t':
+        after += 1
+    return ((before < 0 or text[before] in LIST_BEFORE)
+            and (after == len(text) or text[after] in LIST_AFTER))
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton over every name and alias in a skill taxonomy"""
+
+    def __init__(self, taxonomy):
+        if not isinstance(taxonomy, SkillTaxonomy):
+            taxonomy = SkillTaxonomy.from_names(taxonomy)
+        self.taxonomy = taxonomy
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+
+        for alias, canonical in taxonomy.aliases():
+            if alias:
+                self._insert(alias, canonical, taxonomy.exact.get(alias))
+        self._build_failure_links()
+
+    @property
+    def skills(self):
+        return self.taxonomy.names
+
+    def __len__(self):
+        return len(self.taxonomy)
+
+    def _insert(self, name, canonical, exact=None):
+        state = 0
+        for ch in name:
+            if ch not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][ch] = len(self._goto) - 1
+            state = self._goto[state][ch]
+        self._output[state] = ((len(name), name, canonical, exact),)
+
+    def _build_failure_links(self):
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._output[child] += self._output[self._fail[child]]
+                queue.append(child)
+
+    def find(self, text):
+        """
+        Every skill mention in text as (start, end, canonical skill) spans
+        into the original string, in order, non-overlapping
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        positions = []
+        candidates = []
+        state = 0
+        previous_space = False
+
+        for index, ch in enumerate(text):
+            if ch.isspace():
+                if previous_space:
+                    continue
+                ch = ' '
+                previous_space = True
+            else:
+                ch = ch.lower()
+                previous_space = False
+            positions.append(index)
+
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            for length, name, canonical, exact in output[state]:
+                start = positions[len(positions) - length]
+                if exact is not None and ' '.join(text[start:index + 1].split()) != exact:
+                    continue
+                if _is_short(name) and not _in_list(text, start, index + 1):
+                    continue
+                if self._at_boundary(text, start, index + 1, name):
+                    candidates.append((start, index + 1, canonical))
+
+        spans = []
+        end = 0
+        for span in sorted(candidates, key=lambda span: (span[0], -span[1])):
+            if span[0] >= end:
+                spans.append(span)
+                end = span[1]
+        return spans
+
+    @staticmethod
+    def _at_boundary(text, start, end, name):
+        if _is_word_char(name[0]) and start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if _is_word_char(name[-1]) and end < len(text) and _is_word_char(text[end]):
+            return False
+        return True
+
+    def extract(self, text):
+        """Distinct skills mentioned in text, in order of first mention"""
+        return list(dict.fromkeys(name for _, _, name in self.find(text)))
+
+
+@functools.lru_cache(maxsize=4)
+def _matcher_for(taxonomy):
+    return SkillMatcher(taxonomy)
+
+
+def get_skill_matcher(path=None):
+    """Shared matcher for a taxonomy file (default: the configured one), rebuilt when the file changes"""
+    return _matcher_for(get_taxonomy(path))
@@ -0,0 +1,142 @@
+"""
+Skill taxonomy: aliases -> canonical skills.
+
+"JS", "ECMAScript" and "javascript" are the same skill. The taxonomy file
+lists one canonical skill per line followed by its aliases, comma separated:
+
+    javascript, js, ecmascript, es6
+
+A name written with a leading '=' is an everyday word too ('rust', 'swift'):
+the skill extractor only finds it in text capitalized exactly as written
+('=Rust' finds "Rust" but not "rust never sleeps"). Everywhere else it resolves
+case-insensitively like any other name.
+
+Every name (canonical or alias) is indexed in a hash map from its normalized
+form (lowercase, single spaces) to the canonical skill's id, so resolving a
+name costs one pass over its characters. Names missing from the taxonomy
+resolve to their normalized form, so unlisted skills still compare equal to
+themselves.
+"""
+import hashlib
+import os
+import threading
+import time
+
+DEFAULT_TAXONOMY_FILE = os.path.join(os.path.dirname(__file__), 'data', 'skills.txt')
+
+# How often get_taxonomy() checks the file for changes
+RELOAD_CHECK_SECONDS = 5
+
+_path = None
+_cache = {}
+_lock = threading.Lock()
+
+
+def normalize_skill(name):
+    return ' '.join(name.lower().split())
+
+
+def load_entries(path):
+    """[canonical, alias, ...] lists from a taxonomy file; blank lines and # comments are skipped"""
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip() and not line.lstrip().startswith('#'):
+                entries.append([name.strip() for name in line.split(',') if name.strip()])
+    return entries
+
+
+class SkillTaxonomy:
+    """Hash index from every normalized skill name and alias to a canonical skill id"""
+
+    def __init__(self, entries):
+        self.names = []
+        self._ids = {}
+        # Normalized name -> the only spelling the extractor matches in text
+        self.exact = {}
+        self._fingerprint = None
+        for names in entries:
+            canonical = normalize_skill(names[0].lstrip('='))
+            skill_id = self._ids.get(canonical)
+            if skill_id is None:
+                skill_id = len(self.names)
+                self.names.append(canonical)
+            for name in names:
+                exact = name.startswith('=')
+                name = name.lstrip('=')
+                key = normalize_skill(name)
+                # The first entry to claim an alias keeps it
+                if key not in self._ids:
+                    self._ids[key] = skill_id
+                    if exact:
+                        self.exact[key] = ' '.join(name.split())
+
+    @classmethod
+    def from_names(cls, names):
+        """A taxonomy without aliases"""
+        return cls([[name] for name in names])
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return normalize_skill(name) in self._ids
+
+    def canonical_id(self, name):
+        """Id of the canonical skill for name, or None if the taxonomy does not list it"""
+        return self._ids.get(normalize_skill(name))
+
+    def canonical(self, name):
+        """Canonical name for name; unlisted names come back normalized"""
+        name = normalize_skill(name)
+        skill_id = self._ids.get(name)
+        return name if skill_id is None else self.names[skill_id]
+
+    def canonicalize(self, names):
+        """Distinct canonical names of a list of skills, in first-seen order, without blanks"""
+        return [name for name in dict.fromkeys(self.canonical(name) for name in names) if name]
+
+    def aliases(self):
+        """(normalized name, canonical name) for every indexed name"""
+        return [(name, self.names[skill_id]) for name, skill_id in self._ids.items()]
+
+    @property
+    def fingerprint(self):
+        """Short hash of the alias -> canonical mapping; changes whenever the taxonomy does"""
+        if self._fingerprint is None:
+            mapping = '\n'.join(f'{alias}\t{canonical}\t{self.exact.get(alias, "")}'
+                                 for alias, canonical in sorted(self.aliases()))
+            self._fingerprint = hashlib.sha256(mapping.encode('utf-8')).hexdigest()[:16]
+        return self._fingerprint
+
+
+def configure(path=None):
+    """Set the taxonomy file get_taxonomy() uses by default"""
+    global _path
+    _path = path or None
+
+
+def get_taxonomy(path=None):
+    """Shared taxonomy for a file (default: the configured one), reloaded when the file changes"""
+    path = os.path.abspath(path or _path or DEFAULT_TAXONOMY_FILE)
+    now = time.monotonic()
+    cached = _cache.get(path)
+    if cached is not None and now - cached[0] < RELOAD_CHECK_SECONDS:
+        return cached[2]
+
+    with _lock:
+        modified = os.path.getmtime(path)
+        if cached is None or cached[1] != modified:
+            taxonomy = SkillTaxonomy(load_entries(path))
+        else:
+            taxonomy = cached[2]
+        _cache[path] = (now, modified, taxonomy)
+    return taxonomy
+
+
+def canonical_skill(name):
+    return get_taxonomy().canonical(name)
+
+
+def canonical_skills(names):
+    return get_taxonomy().canonicalize(name for name in names if isinstance(name, str))
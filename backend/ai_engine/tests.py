@@ -0,0 +1,71 @@
+import unittest
+
+from .resume_parser import ResumeParser
+from .resume_text import ResumeText
+from .skill_extractor import get_skill_matcher
+
+
+class ShortSkillNameTests(unittest.TestCase):
+    """One- and two-letter names ('r', 'go') are only skills as items of a list"""
+
+    def setUp(self):
+        self.extract = get_skill_matcher().extract
+
+    def test_r_and_d_is_not_r(self):
+        self.assertNotIn('r', self.extract('R&D lead for the data platform'))
+
+    def test_middle_initial_is_not_r(self):
+        self.assertNotIn('r', self.extract('John R. Smith\njohn@example.com'))
+
+    def test_sentence_starting_with_go_is_not_go(self):
+        self.assertNotIn('go', self.extract('Go the extra mile for every customer.'))
+        self.assertNotIn('go', self.extract('Ready to go the extra mile'))
+
+    def test_skills_list(self):
+        skills = self.extract('Skills: Python, Go, R\nLanguages: Java / TS')
+        for skill in ('python', 'go', 'r', 'java', 'typescript'):
+            self.assertIn(skill, skills)
+
+    def test_bullets(self):
+        skills = self.extract('Skills\n- Go\n• R\n* Docker')
+        for skill in ('go', 'r', 'docker'):
+            self.assertIn(skill, skills)
+
+    def test_longer_names_match_in_prose(self):
+        self.assertEqual(self.extract('Built services in golang on kubernetes'), ['go', 'kubernetes'])
+
+
+class EverydayWordSkillTests(unittest.TestCase):
+    """Names marked with '=' in the taxonomy only match as capitalized"""
+
+    def setUp(self):
+        self.extract = get_skill_matcher().extract
+
+    def test_lowercase_word_is_not_a_skill(self):
+        self.assertEqual(self.extract('rust never sleeps; express ideas swiftly'), [])
+
+    def test_capitalized_name_is_a_skill(self):
+        self.assertEqual(self.extract('Wrote Rust and Swift'), ['rust', 'swift'])
+
+
+class ExperienceTests(unittest.TestCase):
+    def extract(self, text):
+        return ResumeParser()._extract_experience(ResumeText(text))
+
+    def test_period_with_role_and_description(self):
+        experience = self.extract('Jane\nSenior Developer, Acme\n2019 - Present\nBuilt the API\nLed 3 people\nHobbies')
+        self.assertEqual(experience, [{'period': '2019 - Present',
+                                       'context': 'Senior Developer, Acme 2019 - Present Built the API Led 3 people'}])
+
+    def test_several_periods_on_one_line(self):
+        periods = [entry['period'] for entry in self.extract('Acme 2015-2019, Initech 2012–2014')]
+        self.assertEqual(periods, ['2015-2019', '2012–2014'])
+
+    def test_period_wrapped_onto_the_next_line(self):
+        experience = self.extract('Developer, Acme\n2019 -\n2021\nBuilt things')
+        self.assertEqual([entry['period'] for entry in experience], ['2019 -\n2021'])
+        self.assertIn('Developer, Acme', experience[0]['context'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,376 @@
+"""
+Pure-NumPy vector index for normalized embeddings.
+
+Below exact_threshold vectors every search is an exact brute-force scan.
+Above it the index is an IVF (inverted file): vectors are clustered with
+spherical k-means, stored sorted by cluster, and a search only scores the
+n_probe clusters whose centroids are closest to the query.
+
+With quantized=True the scan runs over int8 codes (a quarter of the memory
+traffic) and only the best k * rerank_factor rows are re-scored with the
+float vectors, which can stay memory-mapped on disk.
+
+Updates are incremental: new or changed vectors are appended to an
+unclustered tail that is always scanned, removed vectors are tombstoned, and
+both are folded into the clustered region on the next compact()/save(). The
+tail is a separate buffer that grows by doubling, so an upsert costs O(rows
+added) and never copies (or pages in) the saved base arrays.
+The saved index is a directory of .npy files that is memory-mapped on load.
+"""
+import json
+import os
+
+import numpy as np
+
+from .quantization import quantize, search_quantized, top_k
+
+MANIFEST = 'manifest.json'
+
+
+class VectorIndex:
+    def __init__(self, dimensions, exact_threshold=2000, n_probe=8, quantized=False, rerank_factor=4):
+        self.dimensions = dimensions
+        self.exact_threshold = exact_threshold
+        self.n_probe = n_probe
+        self.quantized = quantized
+        self.rerank_factor = rerank_factor
+
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors = np.empty((0, dimensions), dtype=np.float32)
+        self._codes = np.empty((0, dimensions), dtype=np.int8)
+        self._scales = np.empty(0, dtype=np.float32)
+        self._deleted = np.empty(0, dtype=bool)
+        # Rows [offsets[i], offsets[i + 1]) belong to cluster i; later base
+        # rows are unclustered.
+        self._offsets = np.zeros(1, dtype=np.int64)
+        # Rows upserted since the last compact(), in buffers with spare
+        # capacity; row numbers continue after the base rows
+        self._tail_ids = np.empty(0, dtype=np.int64)
+        self._tail_vectors = np.empty((0, dimensions), dtype=np.float32)
+        self._tail_codes = np.empty((0, dimensions), dtype=np.int8)
+        self._tail_scales = np.empty(0, dtype=np.float32)
+        self._tail_deleted = np.empty(0, dtype=bool)
+        self._tail_len = 0
+        self._centroids = np.empty((0, dimensions), dtype=np.float32)
+        self._trained_size = 0
+        self._row_by_id = {}
+        self.generation = 0
+        self.metadata = {}
+
+    def __len__(self):
+        return len(self._row_by_id)
+
+    def __contains__(self, item_id):
+        return int(item_id) in self._row_by_id
+
+    def ids(self):
+        """Ids of the vectors in the index"""
+        return list(self._row_by_id)
+
+    @property
+    def is_trained(self):
+        return len(self._centroids) > 0
+
+    @property
+    def tail_size(self):
+        """Rows not yet folded into the clustered region (including tombstones)"""
+        return len(self._ids) - int(self._offsets[-1]) + self._tail_len
+
+    def upsert(self, ids, vectors, codes=None, scales=None):
+        """
+        Add or replace vectors; new rows go to the unclustered tail
+
+        Pre-computed int8 codes and scales can be passed to skip quantizing.
+        """
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dimensions)
+        if not len(ids):
+            return
+
+        self.remove(ids)
+
+        if codes is None or scales is None:
+            codes, scales = quantize(vectors)
+        start = self._tail_len
+        end = start + len(ids)
+        self._reserve_tail(end)
+        self._tail_ids[start:end] = ids
+        self._tail_vectors[start:end] = vectors
+        self._tail_codes[start:end] = codes
+        self._tail_scales[start:end] = scales
+        self._tail_deleted[start:end] = False
+        self._tail_len = end
+        base = len(self._ids)
+        for offset, item_id in enumerate(ids.tolist()):
+            self._row_by_id[item_id] = base + start + offset
+
+    def _reserve_tail(self, size):
+        """Grow the tail buffers to hold size rows, at least doubling them"""
+        capacity = len(self._tail_ids)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 64)
+        n = self._tail_len
+        for name in ('_tail_ids', '_tail_vectors', '_tail_codes', '_tail_scales', '_tail_deleted'):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:n] = old[:n]
+            setattr(self, name, new)
+
+    def remove(self, ids):
+        """Tombstone vectors; their rows are dropped on the next compact()"""
+        rows = np.array([self._row_by_id.pop(int(item_id)) for item_id in np.asarray(ids).reshape(-1)
+                         if int(item_id) in self._row_by_id], dtype=np.int64)
+        if not len(rows):
+            return
+        base = len(self._ids)
+        if not self._deleted.flags.writeable:
+            self._deleted = self._deleted.copy()
+        self._deleted[rows[rows < base]] = True
+        self._tail_deleted[rows[rows >= base] - base] = True
+
+    def search(self, query, k=10):
+        """Return up to k (id, score) pairs, best first"""
+        if not len(self):
+            return []
+
+        query = np.asarray(query, dtype=np.float32).reshape(self.dimensions)
+
+        if len(self) <= self.exact_threshold or not self.is_trained:
+            rows = None
+        else:
+            rows = self._probe_rows(query)
+        hits = self._search_rows(self._ids, self._vectors, self._codes, self._scales, self._deleted,
+                                 rows, query, k)
+
+        n = self._tail_len
+        if n:
+            hits += self._search_rows(self._tail_ids[:n], self._tail_vectors[:n], self._tail_codes[:n],
+                                      self._tail_scales[:n], self._tail_deleted[:n], None, query, k)
+            hits.sort(key=lambda hit: -hit[1])
+        return hits[:k]
+
+    def _search_rows(self, ids, vectors, codes, scales, deleted, rows, query, k):
+        """Best k (id, score) pairs among rows, or among every row when rows is None"""
+        if rows is None:
+            return self._search_all(ids, vectors, codes, scales, deleted, query, k)
+
+        rows = rows[~deleted[rows]]
+        if not len(rows):
+            return []
+
+        if self.quantized:
+            top, scores = search_quantized(
+                codes[rows], scales[rows], _RowView(vectors, rows), query, k, self.rerank_factor
+            )
+        else:
+            scores = vectors[rows] @ query
+            top = top_k(scores, k)
+            scores = scores[top]
+
+        return [(int(ids[rows[i]]), float(score)) for i, score in zip(top, scores)]
+
+    def _search_all(self, ids, vectors, codes, scales, deleted, query, k):
+        # Whole arrays rather than an index of every row: fancy indexing
+        # would copy the matrices on each query
+        skip = deleted if deleted.any() else None
+        if self.quantized:
+            top, scores = search_quantized(codes, scales, vectors, query, k, self.rerank_factor, skip)
+        else:
+            scores = np.asarray(vectors @ query)
+            if skip is not None:
+                scores[skip] = -np.inf
+            top = top_k(scores, k)
+            if skip is not None:
+                top = top[~skip[top]]
+            scores = scores[top]
+
+        return [(int(ids[i]), float(score)) for i, score in zip(top, scores)]
+
+    def _probe_rows(self, query):
+        centroid_scores = self._centroids @ query
+        n_probe = min(self.n_probe, len(self._centroids))
+        probed = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+
+        ranges = [np.arange(self._offsets[c], self._offsets[c + 1]) for c in probed]
+        # Unclustered base rows are always scanned, like the tail
+        ranges.append(np.arange(self._offsets[-1], len(self._ids)))
+        return np.concatenate(ranges)
+
+    def compact(self, retrain=None):
+        """
+        Drop tombstones and cluster the tail into the base rows.
+
+        Clusters are (re)trained when the index crosses exact_threshold for
+        the first time or has doubled since it was last trained.
+        """
+        alive = ~self._deleted
+        n = self._tail_len
+        tail_alive = ~self._tail_deleted[:n]
+        ids = np.concatenate([self._ids[alive], self._tail_ids[:n][tail_alive]])
+        vectors = np.concatenate([self._vectors[alive], self._tail_vectors[:n][tail_alive]])
+        codes = np.concatenate([self._codes[alive], self._tail_codes[:n][tail_alive]])
+        scales = np.concatenate([self._scales[alive], self._tail_scales[:n][tail_alive]])
+
+        if retrain is None:
+            retrain = len(ids) > self.exact_threshold and (
+                not self.is_trained or len(ids) > 2 * self._trained_size
+            )
+
+        if retrain and len(ids):
+            self._centroids = _train_centroids(vectors)
+            self._trained_size = len(ids)
+
+        if self.is_trained and len(ids):
+            assignments = _assign(vectors, self._centroids)
+            order = np.argsort(assignments, kind='stable')
+            ids, vectors = ids[order], vectors[order]
+            codes, scales = codes[order], scales[order]
+            counts = np.bincount(assignments, minlength=len(self._centroids))
+            self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        else:
+            self._offsets = np.zeros(1, dtype=np.int64)
+
+        self._set_rows(ids, vectors, codes, scales)
+
+    def _set_rows(self, ids, vectors, codes, scales):
+        self._ids = ids
+        self._vectors = vectors
+        self._codes = codes
+        self._scales = scales
+        self._deleted = np.zeros(len(ids), dtype=bool)
+        self._row_by_id = {item_id: row for row, item_id in enumerate(ids.tolist())}
+        self._tail_ids = self._tail_ids[:0]
+        self._tail_vectors = self._tail_vectors[:0]
+        self._tail_codes = self._tail_codes[:0]
+        self._tail_scales = self._tail_scales[:0]
+        self._tail_deleted = self._tail_deleted[:0]
+        self._tail_len = 0
+
+    def save(self, directory, metadata=None):
+        """Compact and write the index; returns the new generation number"""
+        self.compact()
+        os.makedirs(directory, exist_ok=True)
+
+        previous = read_generation(directory)
+        generation = previous + 1
+        for name, array in self._arrays().items():
+            np.save(os.path.join(directory, f'{generation}.{name}.npy'), array)
+
+        manifest = {
+            'generation': generation,
+            'dimensions': self.dimensions,
+            'trained_size': self._trained_size,
+            'metadata': metadata or {},
+        }
+        tmp_path = os.path.join(directory, f'{MANIFEST}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(directory, MANIFEST))
+        self.generation = generation
+        self.metadata = manifest['metadata']
+
+        # Readers that still map the old files keep them alive until they reload
+        if previous:
+            for name in self._arrays():
+                try:
+                    os.remove(os.path.join(directory, f'{previous}.{name}.npy'))
+                except OSError:
+                    pass
+
+        return generation
+
+    def _arrays(self):
+        return {
+            'ids': self._ids,
+            'vectors': self._vectors,
+            'codes': self._codes,
+            'scales': self._scales,
+            'offsets': self._offsets,
+            'centroids': self._centroids,
+        }
+
+    @classmethod
+    def load(cls, directory, mmap=True, **kwargs):
+        """Load a saved index, memory-mapping its arrays; returns None if there is none"""
+        manifest = read_manifest(directory)
+        if manifest is None:
+            return None
+        generation = manifest['generation']
+
+        mmap_mode = 'r' if mmap else None
+        arrays = {
+            name: np.load(os.path.join(directory, f'{generation}.{name}.npy'), mmap_mode=mmap_mode)
+            for name in ('ids', 'vectors', 'codes', 'scales', 'offsets', 'centroids')
+        }
+
+        index = cls(manifest['dimensions'], **kwargs)
+        # Codes are scanned on every search, so keep them in memory; float
+        # vectors are only touched for re-ranking and stay memory-mapped.
+        index._set_rows(
+            np.asarray(arrays['ids']), arrays['vectors'],
+            np.array(arrays['codes']), np.array(arrays['scales'])
+        )
+        index._offsets = np.asarray(arrays['offsets'])
+        index._centroids = np.asarray(arrays['centroids'])
+        index._trained_size = manifest['trained_size']
+        index.generation = generation
+        index.metadata = manifest.get('metadata', {})
+        return index
+
+
+class _RowView:
+    """Lazy row selection, so re-ranking reads only the candidate rows of a memory-mapped matrix"""
+
+    def __init__(self, array, rows):
+        self.array = array
+        self.rows = rows
+
+    def __getitem__(self, index):
+        return self.array[self.rows[index]]
+
+
+def read_manifest(directory):
+    """Manifest of the index saved in directory, or None if there is none"""
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_generation(directory):
+    """Generation number of the index saved in directory (0 if none)"""
+    manifest = read_manifest(directory)
+    return manifest['generation'] if manifest else 0
+
+
+def _assign(vectors, centroids, chunk_size=8192):
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = vectors[start:start + chunk_size]
+        assignments[start:start + chunk_size] = (chunk @ centroids.T).argmax(axis=1)
+    return assignments
+
+
+def _train_centroids(vectors, iterations=10, seed=0):
+    """Spherical k-means with about sqrt(n) clusters, trained on a sample"""
+    n_lists = int(min(4096, max(1, np.sqrt(len(vectors)))))
+    rng = np.random.default_rng(seed)
+
+    sample_size = min(len(vectors), n_lists * 64)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Re-seed empty clusters from random sample points
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        norms[empty] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+
+    return centroids
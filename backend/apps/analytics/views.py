@@ -20,10 +20,11 @@ def dashboard_analytics(request):
     # Average match scores
     avg_match_score = Match.objects.aggregate(avg=Avg('match_percentage'))['avg'] or 0
     
-    # Most common skills
+    # Most common skills, counted once per resume under their canonical name
+    from ai_engine.skill_taxonomy import canonical_skills
     all_skills = []
     for resume in Resume.objects.filter(is_processed=True):
-        all_skills.extend(resume.parsed_data.get('skills', []))
+        all_skills.extend(canonical_skills(resume.parsed_data.get('skills', [])))
     
     from collections import Counter
     skill_counts = Counter(all_skills)
@@ -0,0 +1,170 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from apps.jobs.models import JobApplication
+
+
+def _applications(only_unscored):
+    applications = JobApplication.objects.all()
+    if only_unscored:
+        applications = applications.filter(match_score=0.0)
+    return applications
+
+
+def _init_worker():
+    import django
+    django.setup()
+    # Forget the database connections inherited from the parent without
+    # closing them: closing would end the parent's session too
+    for conn in connections.all(initialized_only=True):
+        conn.connection = None
+
+
+def _score_chunk(application_ids):
+    """
+    Score a chunk of applications; returns (number updated, [(id, error)]
+    for the applications that could not be scored)
+
+    If the chunk fails as a whole, its applications are scored one by one
+    so a single bad application does not hold back the rest.
+    """
+    from apps.jobs.tasks import score_applications
+    applications = list(JobApplication.objects.filter(id__in=application_ids).select_related('resume', 'job'))
+    try:
+        return score_applications(applications), []
+    except Exception:
+        pass
+
+    updated = 0
+    failed = []
+    for application in applications:
+        try:
+            updated += score_applications([application])
+        except Exception as e:
+            failed.append((application.id, str(e)))
+    return updated, failed
+
+
+class Command(BaseCommand):
+    help = 'Recalculate job application match scores in chunks, optionally across processes, resuming from a checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Rescore every application, not only those with a 0% score')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Worker processes; 1 scores in this process')
+        parser.add_argument('--checkpoint', default=os.path.join(settings.BASE_DIR, '.recalculate_match_scores.json'),
+                            help='File recording the last fully processed application id')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+
+    def handle(self, *args, **options):
+        only_unscored = not options['all']
+        self.checkpoint_path = options['checkpoint']
+        chunk_size = options['chunk_size']
+
+        last_id = 0 if options['restart'] else self._load_checkpoint(only_unscored)
+        if last_id:
+            self.stdout.write(f'Resuming after application {last_id}')
+
+        remaining = _applications(only_unscored).filter(id__gt=last_id).count()
+        self.stdout.write(f'Found {remaining} applications to score')
+
+        chunks = self._chunks(only_unscored, last_id, chunk_size)
+        if options['workers'] > 1:
+            updated = self._run_pool(chunks, options['workers'], only_unscored)
+        else:
+            updated = 0
+            for chunk in chunks:
+                chunk_updated, failed = _score_chunk(chunk)
+                updated += chunk_updated
+                self._report_failures(failed)
+                self._save_checkpoint(chunk[-1], only_unscored)
+                self.stdout.write(f'Scored {updated} applications (up to id {chunk[-1]})')
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(f'Successfully updated {updated} applications'))
+
+    def _chunks(self, only_unscored, last_id, chunk_size):
+        """Application ids in ascending chunks, read one chunk at a time"""
+        while True:
+            chunk = list(
+                _applications(only_unscored).filter(id__gt=last_id)
+                .order_by('id').values_list('id', flat=True)[:chunk_size]
+            )
+            if not chunk:
+                return
+            last_id = chunk[-1]
+            yield chunk
+
+    def _run_pool(self, chunks, workers, only_unscored):
+        """
+        Score chunks in worker processes, keeping at most 2 * workers in flight
+
+        Chunks finish out of order, so the checkpoint only advances past a
+        chunk once every earlier chunk has finished too.
+        """
+        updated = 0
+        pending = {}
+        finished = set()
+        order = []
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            chunks = iter(chunks)
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    # Reading the chunk reopened the connection; workers are
+                    # forked on submit and must not inherit it
+                    connections.close_all()
+                    pending[pool.submit(_score_chunk, chunk)] = chunk[-1]
+                    order.append(chunk[-1])
+
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk_updated, failed = future.result()
+                    updated += chunk_updated
+                    self._report_failures(failed)
+                    finished.add(pending.pop(future))
+
+                checkpoint = None
+                while order and order[0] in finished:
+                    checkpoint = order.pop(0)
+                    finished.discard(checkpoint)
+                if checkpoint is not None:
+                    self._save_checkpoint(checkpoint, only_unscored)
+                    self.stdout.write(f'Scored {updated} applications (all up to id {checkpoint})')
+
+        return updated
+
+    def _report_failures(self, failed):
+        for application_id, error in failed:
+            self.stderr.write(f'Error processing application {application_id}: {error}')
+
+    def _load_checkpoint(self, only_unscored):
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if checkpoint.get('only_unscored') != only_unscored:
+            self.stdout.write(self.style.WARNING('Ignoring checkpoint from a run with different options'))
+            return 0
+        return checkpoint.get('last_id', 0)
+
+    def _save_checkpoint(self, last_id, only_unscored):
+        tmp_path = f'{self.checkpoint_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'last_id': last_id, 'only_unscored': only_unscored}, f)
+        os.replace(tmp_path, self.checkpoint_path)
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:51
+
+from django.db import migrations, models
+
+
+# Frozen copies of ai_engine.skill_bits as of this migration, so rerunning it
+# gives the same result whatever the skill taxonomy says later
+def normalize(name):
+    return name.strip().lower()
+
+
+def to_bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def compile_job_skills(apps, schema_editor):
+    Skill = apps.get_model('matching', 'Skill')
+    Job = apps.get_model('jobs', 'Job')
+    ids = dict(Skill.objects.values_list('name', 'id'))
+
+    for job in Job.objects.iterator():
+        names = {normalize(name) for name in job.required_skills if isinstance(name, str)}
+        names = {name for name in names if 0 < len(name) <= 100}
+        new = names - ids.keys()
+        if new:
+            Skill.objects.bulk_create([Skill(name=name) for name in new], ignore_conflicts=True)
+            ids.update(Skill.objects.filter(name__in=new).values_list('name', 'id'))
+
+        bits = 0
+        for name in names:
+            bits |= 1 << ids[name]
+        job.skill_bits = to_bytes(bits)
+        job.save(update_fields=['skill_bits'])
+        job.skills.set([ids[name] for name in names])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0005_skill_vocabulary'),
+        ('jobs', '0002_remove_job_salary_range_job_experience_level_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='skill_bits',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='skills',
+            field=models.ManyToManyField(blank=True, db_table='job_skills', related_name='jobs', to='matching.skill'),
+        ),
+        migrations.RunPython(compile_job_skills, migrations.RunPython.noop),
+    ]
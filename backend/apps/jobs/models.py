@@ -31,6 +31,9 @@ class Job(models.Model):
     # AI fields
     required_skills = models.JSONField(default=list)
     experience_years = models.IntegerField(default=0)
+    # required_skills compiled against the skill vocabulary (see apps.matching.skills)
+    skills = models.ManyToManyField('matching.Skill', related_name='jobs', blank=True, db_table='job_skills')
+    skill_bits = models.BinaryField(default=b'', editable=False)
     
     posted_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='posted_jobs')
     is_active = models.BooleanField(default=True)
@@ -11,6 +11,13 @@ class JobSerializer(serializers.ModelSerializer):
                   'required_skills', 'experience_years', 'posted_by', 
                   'posted_by_name', 'is_active', 'created_at', 'updated_at']
         read_only_fields = ['id', 'posted_by', 'created_at', 'updated_at']
+    
+    def validate_required_skills(self, value):
+        """Store skills under their canonical taxonomy names ('JS' -> 'javascript')"""
+        if not isinstance(value, list) or not all(isinstance(skill, str) for skill in value):
+            raise serializers.ValidationError('Expected a list of skill names')
+        from ai_engine.skill_taxonomy import canonical_skills
+        return canonical_skills(value)
 
 class JobApplicationSerializer(serializers.ModelSerializer):
     job_title = serializers.CharField(source='job.title', read_only=True)
@@ -0,0 +1,58 @@
+from apps.tasks.queue import task
+from .models import JobApplication
+
+
+def calculate_match_score(resume, job):
+    """Semantic match percentage of a resume for a job, from the stored embeddings"""
+    from apps.matching.embeddings import job_to_match_data, get_resume_embedding, get_job_embedding
+    from ai_engine.semantic_matcher import SemanticMatcher
+    
+    matcher = SemanticMatcher()
+    match_result = matcher.match_resume_to_job(
+        resume.parsed_data,
+        job_to_match_data(job),
+        resume_embedding=get_resume_embedding(resume, matcher),
+        job_embedding=get_job_embedding(job, matcher)
+    )
+    return match_result['match_percentage']
+
+
+def score_applications(applications, matcher=None):
+    """
+    Set match_score on many applications with one batch of embedding lookups
+    and one vectorized scoring pass, then write them with bulk_update
+
+    The applications should come with resume and job already loaded
+    (select_related). Returns the number updated.
+    """
+    from django.utils import timezone
+    from apps.matching.embeddings import get_resume_embeddings, get_job_embeddings
+    from ai_engine.semantic_matcher import SemanticMatcher
+    
+    applications = list(applications)
+    if not applications:
+        return 0
+    
+    matcher = matcher or SemanticMatcher()
+    resume_embeddings = get_resume_embeddings({app.resume for app in applications}, matcher)
+    job_embeddings = get_job_embeddings({app.job for app in applications}, matcher)
+    
+    scores = matcher.match_percentages(
+        [resume_embeddings[app.resume_id] for app in applications],
+        [job_embeddings[app.job_id] for app in applications],
+    )
+    
+    now = timezone.now()
+    for app, score in zip(applications, scores):
+        app.match_score = float(score)
+        app.updated_at = now
+    JobApplication.objects.bulk_update(applications, ['match_score', 'updated_at'])
+    return len(applications)
+
+
+@task('jobs.score_application')
+def score_application(application_id):
+    application = JobApplication.objects.select_related('resume', 'job').get(id=application_id)
+    application.match_score = calculate_match_score(application.resume, application.job)
+    application.save(update_fields=['match_score', 'updated_at'])
+    return {'application_id': application.id, 'match_score': application.match_score}
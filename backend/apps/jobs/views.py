@@ -5,6 +5,9 @@ from rest_framework.permissions import IsAuthenticated, AllowAny, IsAuthenticate
 from .models import Job, JobApplication
 from .serializers import JobSerializer, JobApplicationSerializer
 
+# Largest top_candidates shortlist; the search widens to at most 32 times this
+MAX_SHORTLIST = 200
+
 class JobViewSet(viewsets.ModelViewSet):
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -12,11 +15,14 @@ class JobViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = Job.objects.filter(is_active=True)
         
-        # Filter by skills
+        # Filter by skills (top_candidates uses the same param for resume skills)
         skills = self.request.query_params.get('skills', None)
-        if skills:
+        if skills and self.action == 'list':
+            from apps.matching.skills import get_vocabulary
             skill_list = skills.split(',')
-            queryset = queryset.filter(required_skills__overlap=skill_list)
+            vocabulary = get_vocabulary(skill_list)
+            skill_ids = [vocabulary.id_for(skill) for skill in skill_list if skill in vocabulary]
+            queryset = queryset.filter(skills__in=skill_ids).distinct()
         
         return queryset
     
@@ -32,7 +38,8 @@ class JobViewSet(viewsets.ModelViewSet):
             return Response({'error': 'resume_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         from apps.resumes.models import Resume
-        from ai_engine.semantic_matcher import SemanticMatcher
+        from apps.tasks.queue import is_enabled, enqueue
+        from .tasks import calculate_match_score
         
         try:
             resume = Resume.objects.get(id=resume_id, user=request.user)
@@ -43,20 +50,19 @@ class JobViewSet(viewsets.ModelViewSet):
         if JobApplication.objects.filter(job=job, candidate=request.user, resume=resume).exists():
             return Response({'error': 'Already applied'}, status=status.HTTP_400_BAD_REQUEST)
         
+        # Score in the background: the application is saved now and its match_score filled in later
+        if is_enabled():
+            application = JobApplication.objects.create(job=job, candidate=request.user, resume=resume)
+            task = enqueue('jobs.score_application', user=request.user, application_id=application.id)
+            return Response(
+                {**JobApplicationSerializer(application).data, 'task_id': task.id},
+                status=status.HTTP_202_ACCEPTED
+            )
+        
         # Calculate match score
         match_score = 0.0
         try:
-            matcher = SemanticMatcher()
-            match_result = matcher.match_resume_to_job(
-                resume.parsed_data,
-                {
-                    'title': job.title,
-                    'description': job.description,
-                    'requirements': job.requirements,
-                    'required_skills': job.required_skills
-                }
-            )
-            match_score = match_result['match_percentage']
+            match_score = calculate_match_score(resume, job)
         except Exception as e:
             print(f"Error calculating match score: {e}")
         
@@ -69,6 +75,103 @@ class JobViewSet(viewsets.ModelViewSet):
         
         return Response(JobApplicationSerializer(application).data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['get'])
+    def top_candidates(self, request, pk=None):
+        """
+        Best-fitting processed resumes in the system for this job, from the resume vector index
+        
+        Query params: skills (comma separated, all must be present),
+        min_skill_overlap (number of the job's required skills present),
+        limit (size of the shortlist to paginate over, max MAX_SHORTLIST)
+        """
+        if request.user.role not in ['recruiter', 'admin']:
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        job = self.get_object()
+        
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 100)), MAX_SHORTLIST))
+            min_skill_overlap = int(request.query_params.get('min_skill_overlap', 0))
+        except ValueError:
+            return Response({'error': 'limit and min_skill_overlap must be integers'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        from apps.matching.skills import get_vocabulary
+        skills = [skill for skill in request.query_params.get('skills', '').split(',') if skill.strip()]
+        vocabulary = get_vocabulary(skills)
+        # No resume has a skill the vocabulary has never seen
+        required = None if vocabulary.unknown(skills) else vocabulary.bits(skills)
+        
+        try:
+            candidates = self._find_top_candidates(job, limit, required, min_skill_overlap)
+        except MemoryError:
+            return Response(
+                {'error': 'Server memory limit reached. Try again later.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
+        page = self.paginate_queryset(candidates)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(candidates)
+    
+    def _find_top_candidates(self, job, limit, required, min_skill_overlap):
+        """Query the resume index, widening the search until enough resumes pass the skill filters"""
+        if required is None:
+            return []
+        
+        from apps.resumes.models import Resume
+        from apps.matching.embeddings import get_job_embedding
+        from apps.matching.vector_indexes import resume_index
+        from apps.matching.skills import compare_skill_bits, job_bits
+        from ai_engine.semantic_matcher import SemanticMatcher
+        from ai_engine.skill_bits import from_bytes, popcount, to_bytes
+        
+        matcher = SemanticMatcher()
+        job_embedding = get_job_embedding(job, matcher)
+        job_skills = job_bits(job)
+        job_skill_bits = to_bytes(job_skills)
+        
+        k = limit * 2 if (required or min_skill_overlap) else limit
+        while True:
+            hits = resume_index.search(job_embedding, k)
+            # Only what a shortlist entry shows: parsed_data holds the whole resume text
+            resumes = Resume.objects.filter(is_processed=True).select_related('user').only(
+                'id', 'user_id', 'user__username', 'name', 'skill_bits'
+            ).in_bulk([resume_id for resume_id, _ in hits])
+            
+            candidates = []
+            for resume_id, score in hits:
+                resume = resumes.get(resume_id)
+                if resume is None:
+                    continue
+                
+                # Both filters are single AND/popcount operations on the skill bitmaps
+                resume_skills = from_bytes(resume.skill_bits)
+                if (resume_skills & required) != required:
+                    continue
+                if popcount(resume_skills & job_skills) < min_skill_overlap:
+                    continue
+                
+                matched_skills, missing_skills = compare_skill_bits(resume.skill_bits, job_skill_bits)
+                
+                candidates.append({
+                    'resume_id': resume.id,
+                    'candidate_id': resume.user_id,
+                    'candidate_name': resume.user.username,
+                    'name': resume.name,
+                    'match_percentage': round(score * 100, 2),
+                    'matched_skills': matched_skills,
+                    'missing_skills': missing_skills
+                })
+                if len(candidates) == limit:
+                    return candidates
+            
+            # Index exhausted, or filters too strict to keep widening
+            if len(hits) < k or k >= limit * 32:
+                return candidates
+            k *= 4
+
 class JobApplicationViewSet(viewsets.ModelViewSet):
     serializer_class = JobApplicationSerializer
     permission_classes = [IsAuthenticated]
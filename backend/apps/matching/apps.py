@@ -3,3 +3,20 @@ from django.apps import AppConfig
 class MatchingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.matching'
+    
+    def ready(self):
+        from django.conf import settings
+        from ai_engine import skill_taxonomy
+        from ai_engine.model_registry import registry
+        from . import signals  # noqa: F401
+        
+        skill_taxonomy.configure(settings.SKILL_TAXONOMY_FILE)
+        registry.configure(
+            server_socket=settings.EMBEDDING_SERVER_SOCKET,
+            batching=settings.EMBEDDING_BATCHING,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+            cache_size=settings.EMBEDDING_CACHE_SIZE,
+            disk_cache_path=settings.EMBEDDING_DISK_CACHE_PATH,
+            disk_cache_slots=settings.EMBEDDING_DISK_CACHE_SLOTS,
+        )
@@ -0,0 +1,201 @@
+"""
+Persistent resume/job embeddings.
+
+Each resume and job is embedded once and the vector is stored next to the
+hash of the text it was computed from. Lookups recompute only when the text,
+the model or the text layout version changed.
+"""
+import logging
+
+from django.utils import timezone
+
+from .models import ResumeEmbedding, JobEmbedding
+
+logger = logging.getLogger(__name__)
+
+
+def job_to_match_data(job):
+    """Job fields used by SemanticMatcher"""
+    return {
+        'title': job.title,
+        'description': job.description,
+        'requirements': job.requirements,
+        'required_skills': job.required_skills
+    }
+
+
+def _get_matcher(matcher):
+    if matcher is None:
+        from ai_engine.semantic_matcher import SemanticMatcher
+        matcher = SemanticMatcher()
+    return matcher
+
+
+def _is_current(stored, text_hash, matcher):
+    return (
+        stored is not None
+        and stored.text_hash == text_hash
+        and stored.model_name == matcher.model_name
+        and stored.model_version == matcher.embedding_version
+    )
+
+
+def _get_or_refresh(embedding_model, owner_field, owner, text, matcher):
+    text_hash = matcher.text_hash(text)
+    stored = embedding_model.objects.filter(**{owner_field: owner}).first()
+
+    if _is_current(stored, text_hash, matcher):
+        return stored.as_array()
+
+    # Identical text (e.g. a re-uploaded resume) already embedded for another owner
+    donor = (
+        embedding_model.objects.filter(text_hash=text_hash, model_name=matcher.model_name,
+                                       model_version=matcher.embedding_version)
+        .exclude(**{owner_field: owner}).first()
+    )
+    vector = donor.as_array() if donor is not None else matcher.encode([text])[0]
+
+    if stored is None:
+        stored = embedding_model(**{owner_field: owner})
+    stored.set_array(vector)
+    stored.model_name = matcher.model_name
+    stored.model_version = matcher.embedding_version
+    stored.text_hash = text_hash
+    stored.save()
+
+    return vector
+
+
+def get_resume_embedding(resume, matcher=None):
+    """Return the stored embedding for a resume, (re)computing it if missing or stale"""
+    matcher = _get_matcher(matcher)
+    text = matcher._prepare_resume_text(resume.parsed_data)
+    return _get_or_refresh(ResumeEmbedding, 'resume', resume, text, matcher)
+
+
+def get_job_embedding(job, matcher=None):
+    """Return the stored embedding for a job, (re)computing it if missing or stale"""
+    matcher = _get_matcher(matcher)
+    text = matcher._prepare_job_text(job_to_match_data(job))
+    return _get_or_refresh(JobEmbedding, 'job', job, text, matcher)
+
+
+def resume_embedding_is_current(resume, matcher=None):
+    """Whether the stored embedding was computed from the resume's current text"""
+    matcher = _get_matcher(matcher)
+    text_hash = matcher.text_hash(matcher._prepare_resume_text(resume.parsed_data))
+    return _is_current(ResumeEmbedding.objects.filter(resume=resume).first(), text_hash, matcher)
+
+
+def job_embedding_is_current(job, matcher=None):
+    """Whether the stored embedding was computed from the job's current text"""
+    matcher = _get_matcher(matcher)
+    text_hash = matcher.text_hash(matcher._prepare_job_text(job_to_match_data(job)))
+    return _is_current(JobEmbedding.objects.filter(job=job).first(), text_hash, matcher)
+
+
+def get_resume_embeddings(resumes, matcher=None):
+    """
+    Return {resume_id: vector} for many resumes, encoding all stale ones in one batch
+    """
+    matcher = _get_matcher(matcher)
+    texts = {resume.id: matcher._prepare_resume_text(resume.parsed_data) for resume in resumes}
+    return _bulk_get_or_refresh(ResumeEmbedding, 'resume', resumes, texts, matcher)
+
+
+def get_job_embeddings(jobs, matcher=None):
+    """
+    Return {job_id: vector} for many jobs, encoding all stale ones in one batch
+    """
+    matcher = _get_matcher(matcher)
+    texts = {job.id: matcher._prepare_job_text(job_to_match_data(job)) for job in jobs}
+    return _bulk_get_or_refresh(JobEmbedding, 'job', jobs, texts, matcher)
+
+
+def _bulk_get_or_refresh(embedding_model, owner_field, owners, texts, matcher):
+    owners = {owner.id: owner for owner in owners}
+    stored_by_owner = {
+        getattr(stored, f'{owner_field}_id'): stored
+        for stored in embedding_model.objects.filter(**{f'{owner_field}_id__in': list(owners)})
+    }
+
+    vectors = {}
+    stale_ids = []
+    for owner_id, text in texts.items():
+        stored = stored_by_owner.get(owner_id)
+        if _is_current(stored, matcher.text_hash(text), matcher):
+            vectors[owner_id] = stored.as_array()
+        else:
+            stale_ids.append(owner_id)
+
+    if not stale_ids:
+        return vectors
+
+    encoded = matcher.encode([texts[owner_id] for owner_id in stale_ids])
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for owner_id, vector in zip(stale_ids, encoded):
+        vectors[owner_id] = vector
+        stored = stored_by_owner.get(owner_id)
+        if stored is None:
+            stored = embedding_model(**{owner_field: owners[owner_id]})
+            to_create.append(stored)
+        else:
+            to_update.append(stored)
+        stored.set_array(vector)
+        stored.model_name = matcher.model_name
+        stored.model_version = matcher.embedding_version
+        stored.text_hash = matcher.text_hash(texts[owner_id])
+        stored.updated_at = now
+
+    # Another process may have stored the same owner meanwhile; its vector is equivalent
+    embedding_model.objects.bulk_create(to_create, ignore_conflicts=True)
+    embedding_model.objects.bulk_update(
+        to_update, ['vector', 'dimensions', 'quantized_vector', 'scale',
+                    'model_name', 'model_version', 'text_hash', 'updated_at']
+    )
+
+    return vectors
+
+
+def backfill_embeddings(missing, embed, matcher=None, batch_size=256):
+    """
+    Embed every owner in the `missing` queryset, batch_size at a time
+
+    `missing` must stop matching an owner once it is embedded (for example
+    embedding__isnull=True); embed is get_resume_embeddings or
+    get_job_embeddings. Returns the number embedded.
+    """
+    matcher = _get_matcher(matcher)
+    embedded = 0
+    while True:
+        batch = list(missing[:batch_size])
+        if not batch:
+            return embedded
+        embedded += len(embed(batch, matcher))
+
+
+def refresh_resume_embedding(resume, matcher=None):
+    """Embed a resume after it is created or updated; failures are logged, never raised"""
+    if not resume.is_processed:
+        return None
+    try:
+        return get_resume_embedding(resume, matcher)
+    except MemoryError:
+        logger.warning(f'MemoryError while embedding resume {resume.id}')
+    except Exception as e:
+        logger.error(f'Error embedding resume {resume.id}: {str(e)}')
+    return None
+
+
+def refresh_job_embedding(job, matcher=None):
+    """Embed a job after it is created or updated; failures are logged, never raised"""
+    try:
+        return get_job_embedding(job, matcher)
+    except MemoryError:
+        logger.warning(f'MemoryError while embedding job {job.id}')
+    except Exception as e:
+        logger.error(f'Error embedding job {job.id}: {str(e)}')
+    return None
@@ -0,0 +1,188 @@
+"""
+Stale match tracking.
+
+Every Match records content versions of the resume and job it was scored
+from. Saving a resume or job marks only the matches whose recorded version
+no longer matches as stale; a background worker re-scores stale matches in
+batches, and views re-score a stale match inline if it is read first.
+"""
+import hashlib
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Match
+from .embeddings import job_to_match_data, get_resume_embeddings, get_job_embeddings
+from .skills import compare_skills
+
+logger = logging.getLogger(__name__)
+
+
+def _content_version(data):
+    from ai_engine.semantic_matcher import MODEL_NAME, EMBEDDING_VERSION
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{MODEL_NAME}:{EMBEDDING_VERSION}:{payload}'.encode('utf-8')).hexdigest()
+
+
+def resume_version(resume):
+    """Hash of the resume content a match score depends on"""
+    return _content_version(resume.parsed_data)
+
+
+def job_version(job):
+    """Hash of the job content a match score depends on"""
+    return _content_version(job_to_match_data(job))
+
+
+def is_current(match, resume, job):
+    return (
+        not match.is_stale
+        and match.resume_version == resume_version(resume)
+        and match.job_version == job_version(job)
+    )
+
+
+def apply_match_result(match, match_result, resume, job):
+    """Copy a SemanticMatcher result and the versions it was computed from onto a Match"""
+    match.match_percentage = match_result['match_percentage']
+    match.matched_skills = match_result['matched_skills']
+    match.missing_skills = match_result['missing_skills']
+    match.heatmap = match_result['heatmap']
+    match.recommendation = match_result['recommendation']
+    match.resume_version = resume_version(resume)
+    match.job_version = job_version(job)
+    match.is_stale = False
+    return match
+
+
+def mark_resume_matches_stale(resume):
+    """Flag matches scored against an older version of this resume; returns how many"""
+    count = (
+        Match.objects.filter(resume=resume, is_stale=False)
+        .exclude(resume_version=resume_version(resume))
+        .update(is_stale=True)
+    )
+    if count:
+        schedule_recompute()
+    return count
+
+
+def mark_job_matches_stale(job):
+    """Flag matches scored against an older version of this job; returns how many"""
+    count = (
+        Match.objects.filter(job=job, is_stale=False)
+        .exclude(job_version=job_version(job))
+        .update(is_stale=True)
+    )
+    if count:
+        schedule_recompute()
+    return count
+
+
+def recompute_stale_matches(batch_size=None, matcher=None):
+    """
+    Re-score every stale match, batch_size rows at a time
+
+    Matches whose resume is unprocessed or whose job is inactive stay stale.
+    Returns the number of matches re-scored.
+    """
+    batch_size = batch_size or settings.MATCH_RECOMPUTE_BATCH_SIZE
+    if matcher is None:
+        from ai_engine.semantic_matcher import SemanticMatcher
+        matcher = SemanticMatcher()
+
+    updated = 0
+    last_id = 0
+    while True:
+        batch = list(
+            Match.objects.filter(is_stale=True, id__gt=last_id)
+            .select_related('resume', 'job')
+            .order_by('id')[:batch_size]
+        )
+        if not batch:
+            return updated
+        last_id = batch[-1].id
+
+        batch = [m for m in batch if m.resume.is_processed and m.job.is_active]
+        if not batch:
+            continue
+
+        resume_embeddings = get_resume_embeddings({m.resume for m in batch}, matcher)
+        job_embeddings = get_job_embeddings({m.job for m in batch}, matcher)
+
+        now = timezone.now()
+        rescored = []
+        for match in batch:
+            try:
+                match_result = matcher.match_resume_to_job(
+                    match.resume.parsed_data,
+                    job_to_match_data(match.job),
+                    resume_embedding=resume_embeddings[match.resume_id],
+                    job_embedding=job_embeddings[match.job_id],
+                    skills=compare_skills(match.resume, match.job)
+                )
+            except Exception as e:
+                logger.error(f'Error re-scoring match {match.id}: {str(e)}')
+                continue
+            apply_match_result(match, match_result, match.resume, match.job)
+            match.updated_at = now
+            rescored.append(match)
+
+        Match.objects.bulk_update(
+            rescored,
+            ['match_percentage', 'matched_skills', 'missing_skills', 'heatmap',
+             'recommendation', 'resume_version', 'job_version', 'is_stale', 'updated_at'],
+        )
+        updated += len(rescored)
+
+
+class _RecomputeWorker:
+    """One daemon thread per process; repeated wake-ups while it runs coalesce into one more pass"""
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def wake(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='match-recompute', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                count = recompute_stale_matches()
+                if count:
+                    logger.info(f'Re-scored {count} stale matches')
+            except MemoryError:
+                logger.warning('MemoryError while re-scoring stale matches')
+            except Exception as e:
+                logger.error(f'Error re-scoring stale matches: {str(e)}')
+            finally:
+                close_old_connections()
+
+
+_worker = _RecomputeWorker()
+
+
+def schedule_recompute():
+    """
+    Re-score stale matches once the current transaction commits: on the task
+    queue when it is enabled, otherwise in this process's background thread
+    """
+    from apps.tasks.queue import is_enabled, enqueue
+    if is_enabled():
+        transaction.on_commit(lambda: enqueue('matching.recompute_stale_matches', unique=True))
+    elif settings.MATCH_RECOMPUTE_ASYNC:
+        transaction.on_commit(_worker.wake)
+    else:
+        transaction.on_commit(recompute_stale_matches)
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from apps.jobs.models import Job
+from apps.resumes.models import Resume
+from apps.matching.invalidation import schedule_recompute
+from apps.matching.models import Match
+from apps.matching.skills import compile_job_skills, compile_resume_skills, sync_job_skill_rows
+
+
+class Command(BaseCommand):
+    help = ('Recompile resume and job skill bitmaps against the current skill taxonomy '
+            '(run after changing SKILL_TAXONOMY_FILE) and re-score affected matches')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        resume_ids = self._compile(Resume.objects.only('id', 'parsed_data', 'skill_bits'),
+                                   compile_resume_skills, batch_size)
+        self.stdout.write(f'Recompiled {len(resume_ids)} resumes')
+
+        job_ids = self._compile(Job.objects.only('id', 'required_skills', 'skill_bits'),
+                                compile_job_skills, batch_size)
+        for job in Job.objects.filter(id__in=job_ids).only('id', 'skill_bits'):
+            sync_job_skill_rows(job)
+        self.stdout.write(f'Recompiled {len(job_ids)} jobs')
+
+        # Content versions do not cover the taxonomy, so flag these directly
+        stale = 0
+        for start in range(0, len(resume_ids), batch_size):
+            stale += Match.objects.filter(resume_id__in=resume_ids[start:start + batch_size],
+                                          is_stale=False).update(is_stale=True)
+        for start in range(0, len(job_ids), batch_size):
+            stale += Match.objects.filter(job_id__in=job_ids[start:start + batch_size],
+                                          is_stale=False).update(is_stale=True)
+        if stale:
+            schedule_recompute()
+        self.stdout.write(self.style.SUCCESS(f'Marked {stale} matches for re-scoring'))
+
+    @staticmethod
+    def _compile(queryset, compile_skills, batch_size):
+        """Recompile every row's skill_bits; returns the ids whose bitmap changed"""
+        changed = []
+        batch = []
+        for instance in queryset.order_by('id').iterator(chunk_size=batch_size):
+            previous = bytes(instance.skill_bits)
+            compile_skills(instance)
+            if bytes(instance.skill_bits) != previous:
+                batch.append(instance)
+            if len(batch) == batch_size:
+                queryset.model.objects.bulk_update(batch, ['skill_bits'])
+                changed.extend(instance.id for instance in batch)
+                batch = []
+        queryset.model.objects.bulk_update(batch, ['skill_bits'])
+        changed.extend(instance.id for instance in batch)
+        return changed
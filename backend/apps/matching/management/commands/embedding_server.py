@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Run the local embedding server that owns the SentenceTransformer model'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.EMBEDDING_SERVER_SOCKET or '/tmp/job-portal-embeddings.sock')
+        parser.add_argument('--max-batch-size', type=int, default=settings.EMBEDDING_BATCH_MAX_SIZE)
+        parser.add_argument('--max-wait-ms', type=int, default=settings.EMBEDDING_BATCH_MAX_WAIT_MS)
+
+    def handle(self, *args, **options):
+        from ai_engine.embedding_server import EmbeddingServer
+        from ai_engine.semantic_matcher import MODEL_NAME
+
+        server = EmbeddingServer(
+            options['socket'],
+            MODEL_NAME,
+            max_batch_size=options['max_batch_size'],
+            max_wait_ms=options['max_wait_ms'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Embedding server listening on {options['socket']}"))
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
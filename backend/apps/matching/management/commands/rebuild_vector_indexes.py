@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from apps.jobs.models import Job
+from apps.resumes.models import Resume
+from apps.matching.embeddings import get_job_embeddings, get_resume_embeddings, backfill_embeddings
+from apps.matching.vector_indexes import job_index, resume_index
+
+
+class Command(BaseCommand):
+    help = 'Embed active jobs and processed resumes that have no stored embedding and rebuild the vector indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=256)
+
+    def handle(self, *args, **options):
+        from ai_engine.semantic_matcher import SemanticMatcher
+        matcher = SemanticMatcher()
+        batch_size = options['batch_size']
+
+        embedded = backfill_embeddings(Job.objects.filter(is_active=True, embedding__isnull=True),
+                                       get_job_embeddings, matcher, batch_size)
+        self.stdout.write(f'Embedded {embedded} jobs')
+
+        embedded = backfill_embeddings(Resume.objects.filter(is_processed=True, embedding__isnull=True),
+                                       get_resume_embeddings, matcher, batch_size)
+        self.stdout.write(f'Embedded {embedded} resumes')
+
+        size = job_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Job index rebuilt with {size} vectors'))
+        size = resume_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Resume index rebuilt with {size} vectors'))
+
@@ -0,0 +1,142 @@
+import tempfile
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.jobs.models import Job
+from apps.resumes.models import Resume
+from apps.matching.models import Match, ResumeEmbedding, JobEmbedding
+from apps.matching.embeddings import get_job_embeddings, get_resume_embeddings, backfill_embeddings
+from apps.matching.skills import compare_skill_bits
+
+
+class Command(BaseCommand):
+    help = ('Score every processed resume against every active job in bounded-memory tiles '
+            'and upsert Match rows for the best pairs in both directions')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--per-resume', type=int, default=20, help='Best jobs kept per resume')
+        parser.add_argument('--per-job', type=int, default=50, help='Best resumes kept per job')
+        parser.add_argument('--memory-mb', type=int, default=None,
+                            help='Working memory for a score tile (default MATCH_ALL_PAIRS_MEMORY_MB)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Match rows per upsert')
+
+    def handle(self, *args, **options):
+        from ai_engine.all_pairs import all_pairs_top_k
+        from ai_engine.semantic_matcher import SemanticMatcher
+        matcher = SemanticMatcher()
+        memory_mb = options['memory_mb'] or settings.MATCH_ALL_PAIRS_MEMORY_MB
+
+        backfill_embeddings(Job.objects.filter(is_active=True, embedding__isnull=True), get_job_embeddings, matcher)
+        backfill_embeddings(Resume.objects.filter(is_processed=True, embedding__isnull=True),
+                            get_resume_embeddings, matcher)
+
+        with tempfile.TemporaryDirectory() as directory:
+            resume_ids, resumes = self._export(ResumeEmbedding, 'resume', {'is_processed': True}, matcher, directory)
+            job_ids, jobs = self._export(JobEmbedding, 'job', {'is_active': True}, matcher, directory)
+            self.stdout.write(f'Scoring {len(resume_ids)} resumes x {len(job_ids)} jobs')
+            if not len(resume_ids) or not len(job_ids):
+                return
+
+            resume_best, resume_scores, job_best, job_scores = all_pairs_top_k(
+                resumes, jobs, options['per_resume'], options['per_job'], memory_bytes=memory_mb * 2**20
+            )
+            del resumes, jobs
+
+        pairs = {}
+        for row, (best, scores) in enumerate(zip(resume_best, resume_scores)):
+            for column, score in zip(best, scores):
+                pairs[(int(resume_ids[row]), int(job_ids[column]))] = float(score)
+        for column, (best, scores) in enumerate(zip(job_best, job_scores)):
+            for row, score in zip(best, scores):
+                pairs[(int(resume_ids[row]), int(job_ids[column]))] = float(score)
+
+        written = self._upsert(pairs, matcher, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Upserted {written} matches'))
+
+    def _export(self, embedding_model, owner_field, active_filter, matcher, directory, chunk_size=2000):
+        """
+        Copy the current-model embeddings of active owners into a memory-mapped
+        matrix, chunk by chunk, so the full matrix is never held in memory
+        """
+        filters = {f'{owner_field}__{field}': value for field, value in active_filter.items()}
+        embeddings = embedding_model.objects.filter(
+            model_name=matcher.model_name, model_version=matcher.embedding_version, **filters
+        ).order_by(f'{owner_field}_id')
+
+        count = embeddings.count()
+        first = embeddings.first()
+        if first is None:
+            return np.empty(0, dtype=np.int64), None
+
+        ids = np.empty(count, dtype=np.int64)
+        matrix = np.lib.format.open_memmap(
+            f'{directory}/{owner_field}.npy', mode='w+', dtype=np.float32, shape=(count, first.dimensions)
+        )
+        row = 0
+        chunk = []
+        for owner_id, vector in embeddings.values_list(f'{owner_field}_id', 'vector').iterator(chunk_size=chunk_size):
+            chunk.append((owner_id, vector))
+            if len(chunk) == chunk_size:
+                row = self._write_chunk(ids, matrix, row, chunk)
+                chunk = []
+        row = self._write_chunk(ids, matrix, row, chunk)
+        # Rows added while exporting are left for the next run
+        return ids[:row], matrix[:row]
+
+    @staticmethod
+    def _write_chunk(ids, matrix, row, chunk):
+        chunk = chunk[:len(ids) - row]
+        if chunk:
+            ids[row:row + len(chunk)] = [owner_id for owner_id, _ in chunk]
+            matrix[row:row + len(chunk)] = np.frombuffer(
+                b''.join(bytes(vector) for _, vector in chunk), dtype=np.float32
+            ).reshape(len(chunk), matrix.shape[1])
+        return row + len(chunk)
+
+    def _upsert(self, pairs, matcher, batch_size):
+        """
+        Insert or update Match rows for the scored pairs, batch_size at a time
+
+        Existing rows keep their heatmap and content versions. New rows get an
+        empty heatmap and no versions, so the match endpoint re-scores them in
+        full the first time they are requested.
+        """
+        job_skills = dict(Job.objects.filter(is_active=True).values_list('id', 'skill_bits'))
+        keys = sorted(pairs)
+        now = timezone.now()
+        written = 0
+
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            resume_skills = dict(
+                Resume.objects.filter(id__in={resume_id for resume_id, _ in batch}).values_list('id', 'skill_bits')
+            )
+
+            matches = []
+            for resume_id, job_id in batch:
+                if resume_id not in resume_skills or job_id not in job_skills:
+                    continue
+                match_percentage = round(pairs[(resume_id, job_id)] * 100, 2)
+                matched_skills, missing_skills = compare_skill_bits(resume_skills[resume_id], job_skills[job_id])
+                matches.append(Match(
+                    resume_id=resume_id,
+                    job_id=job_id,
+                    match_percentage=match_percentage,
+                    matched_skills=matched_skills,
+                    missing_skills=missing_skills,
+                    recommendation=matcher._generate_recommendation(match_percentage, missing_skills),
+                    updated_at=now,
+                ))
+
+            Match.objects.bulk_create(
+                matches,
+                update_conflicts=True,
+                unique_fields=['resume', 'job'],
+                update_fields=['match_percentage', 'matched_skills', 'missing_skills', 'recommendation', 'updated_at'],
+            )
+            written += len(matches)
+            self.stdout.write(f'Upserted {written}/{len(keys)} matches')
+
+        return written
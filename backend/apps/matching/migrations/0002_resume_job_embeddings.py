@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_remove_job_salary_range_job_experience_level_and_more'),
+        ('resumes', '0001_initial'),
+        ('matching', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vector', models.BinaryField()),
+                ('dimensions', models.PositiveSmallIntegerField()),
+                ('model_name', models.CharField(max_length=100)),
+                ('model_version', models.PositiveSmallIntegerField(default=1)),
+                ('text_hash', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resume', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='embedding', to='resumes.resume')),
+            ],
+            options={
+                'db_table': 'resume_embeddings',
+            },
+        ),
+        migrations.CreateModel(
+            name='JobEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vector', models.BinaryField()),
+                ('dimensions', models.PositiveSmallIntegerField()),
+                ('model_name', models.CharField(max_length=100)),
+                ('model_version', models.PositiveSmallIntegerField(default=1)),
+                ('text_hash', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='embedding', to='jobs.job')),
+            ],
+            options={
+                'db_table': 'job_embeddings',
+            },
+        ),
+    ]
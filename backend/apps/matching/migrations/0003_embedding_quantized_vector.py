@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:38
+
+from django.db import migrations, models
+
+
+def quantize_existing(apps, schema_editor):
+    import numpy as np
+    from ai_engine.quantization import quantize
+
+    for model_name in ('ResumeEmbedding', 'JobEmbedding'):
+        model = apps.get_model('matching', model_name)
+        rows = []
+        for embedding in model.objects.filter(quantized_vector=b'').order_by('id').iterator(chunk_size=500):
+            codes, scales = quantize(np.frombuffer(bytes(embedding.vector), dtype=np.float32))
+            embedding.quantized_vector = codes[0].tobytes()
+            embedding.scale = float(scales[0])
+            rows.append(embedding)
+            if len(rows) == 500:
+                model.objects.bulk_update(rows, ['quantized_vector', 'scale'])
+                rows = []
+        model.objects.bulk_update(rows, ['quantized_vector', 'scale'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0002_resume_job_embeddings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobembedding',
+            name='quantized_vector',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='jobembedding',
+            name='scale',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='resumeembedding',
+            name='quantized_vector',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='resumeembedding',
+            name='scale',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(quantize_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0005_skill_vocabulary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobembedding',
+            name='text_hash',
+            field=models.CharField(db_index=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='resumeembedding',
+            name='text_hash',
+            field=models.CharField(db_index=True, max_length=64),
+        ),
+    ]
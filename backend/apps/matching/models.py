@@ -11,9 +11,78 @@ class Match(models.Model):
     heatmap = models.JSONField(default=list)
     recommendation = models.TextField()
     
+    # Content versions of the resume and job this match was scored from
+    resume_version = models.CharField(max_length=64, blank=True, default='')
+    job_version = models.CharField(max_length=64, blank=True, default='')
+    is_stale = models.BooleanField(default=False, db_index=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'matches'
         unique_together = ['resume', 'job']
         ordering = ['-match_percentage']
+
+class Skill(models.Model):
+    """Skill vocabulary: the id is the skill's bit in Resume/Job.skill_bits"""
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'skills'
+        ordering = ['id']
+    
+    def __str__(self):
+        return self.name
+
+class EmbeddingBase(models.Model):
+    """Stored sentence embedding: a float32 blob plus the model and text it was computed from"""
+    vector = models.BinaryField()
+    dimensions = models.PositiveSmallIntegerField()
+    # int8 scalar-quantized copy of the vector with its per-vector scale. The
+    # float vector is still needed to re-rank the int8 scan's candidates, so
+    # this adds about 25% (dimensions + 8 bytes) to each row; in exchange the
+    # vector indexes load ready-made codes instead of re-quantizing every
+    # row on rebuild (see benchmark_quantization.py for both numbers).
+    quantized_vector = models.BinaryField(default=b'')
+    scale = models.FloatField(default=0.0)
+    model_name = models.CharField(max_length=100)
+    model_version = models.PositiveSmallIntegerField(default=1)
+    text_hash = models.CharField(max_length=64, db_index=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        abstract = True
+    
+    def as_array(self):
+        import numpy as np
+        return np.frombuffer(bytes(self.vector), dtype=np.float32)
+    
+    def as_quantized(self):
+        """Return (int8 codes, scale)"""
+        import numpy as np
+        return np.frombuffer(bytes(self.quantized_vector), dtype=np.int8), self.scale
+    
+    def set_array(self, vector):
+        import numpy as np
+        from ai_engine.quantization import quantize
+        vector = np.asarray(vector, dtype=np.float32)
+        codes, scales = quantize(vector)
+        self.vector = vector.tobytes()
+        self.dimensions = vector.shape[0]
+        self.quantized_vector = codes[0].tobytes()
+        self.scale = float(scales[0])
+
+class ResumeEmbedding(EmbeddingBase):
+    resume = models.OneToOneField('resumes.Resume', on_delete=models.CASCADE, related_name='embedding')
+    
+    class Meta:
+        db_table = 'resume_embeddings'
+
+class JobEmbedding(EmbeddingBase):
+    job = models.OneToOneField('jobs.Job', on_delete=models.CASCADE, related_name='embedding')
+    
+    class Meta:
+        db_table = 'job_embeddings'
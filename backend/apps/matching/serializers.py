@@ -8,5 +8,5 @@ class MatchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Match
         fields = ['id', 'resume', 'job', 'job_title', 'job_company', 'match_percentage', 
-                  'matched_skills', 'missing_skills', 'heatmap', 'recommendation', 'created_at']
-        read_only_fields = ['id', 'created_at']
+                  'matched_skills', 'missing_skills', 'heatmap', 'recommendation', 'is_stale', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'is_stale', 'created_at', 'updated_at']
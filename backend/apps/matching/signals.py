@@ -0,0 +1,64 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from apps.resumes.models import Resume
+from apps.jobs.models import Job
+from .embeddings import (refresh_resume_embedding, refresh_job_embedding,
+                         resume_embedding_is_current, job_embedding_is_current)
+from .vector_indexes import job_index, resume_index
+from .invalidation import mark_resume_matches_stale, mark_job_matches_stale
+from .skills import compile_resume_skills, compile_job_skills, sync_job_skill_rows
+
+@receiver(pre_save, sender=Resume)
+def compile_resume_skill_bits(sender, instance, **kwargs):
+    compile_resume_skills(instance)
+
+@receiver(pre_save, sender=Job)
+def compile_job_skill_bits(sender, instance, **kwargs):
+    compile_job_skills(instance)
+
+@receiver(post_save, sender=Resume)
+def embed_resume_on_save(sender, instance, **kwargs):
+    """Keep the stored resume embedding and the resume index in sync with its parsed data"""
+    # Saves that leave the embedded text as it was need no re-embedding,
+    # index update or stale marking (an index not loaded yet is read from
+    # the database when it is)
+    if (instance.is_processed
+            and (not resume_index.is_loaded or resume_index.is_indexed(instance.id))
+            and resume_embedding_is_current(instance)):
+        return
+    
+    vector = refresh_resume_embedding(instance)
+    
+    if vector is not None:
+        resume_index.upsert(instance.id, vector)
+    else:
+        resume_index.remove(instance.id)
+    
+    mark_resume_matches_stale(instance)
+
+@receiver(post_delete, sender=Resume)
+def remove_resume_from_index(sender, instance, **kwargs):
+    resume_index.remove(instance.id)
+
+@receiver(post_save, sender=Job)
+def embed_job_on_save(sender, instance, **kwargs):
+    """Keep the stored job embedding, the job index and the job's skill rows in sync with the job"""
+    sync_job_skill_rows(instance)
+    
+    if (instance.is_active
+            and (not job_index.is_loaded or job_index.is_indexed(instance.id))
+            and job_embedding_is_current(instance)):
+        return
+    
+    vector = refresh_job_embedding(instance) if instance.is_active else None
+    
+    if vector is not None:
+        job_index.upsert(instance.id, vector)
+    else:
+        job_index.remove(instance.id)
+    
+    mark_job_matches_stale(instance)
+
+@receiver(post_delete, sender=Job)
+def remove_job_from_index(sender, instance, **kwargs):
+    job_index.remove(instance.id)
@@ -0,0 +1,99 @@
+"""
+Skill vocabulary backed by the skills table.
+
+Each process keeps a SkillVocabulary of the rows it has seen and only goes to
+the database for names it does not know yet. Resume.skill_bits and
+Job.skill_bits hold the compiled bitmaps; Job.skills mirrors the job's bits
+as rows so the job listing can filter by skill in SQL.
+"""
+import threading
+
+from ai_engine.skill_bits import SkillVocabulary, normalize, to_bytes, from_bytes, popcount, bit_ids
+from .models import Skill
+
+MAX_NAME_LENGTH = Skill._meta.get_field('name').max_length
+
+_vocabulary = SkillVocabulary()
+_lock = threading.Lock()
+
+
+def _clean(names):
+    names = {normalize(name) for name in names if isinstance(name, str)}
+    return {name for name in names if 0 < len(name) <= MAX_NAME_LENGTH}
+
+
+def get_vocabulary(names=(), create=False):
+    """
+    The process-wide vocabulary, first loading (and with create=True,
+    adding) any of `names` it does not know yet
+    """
+    unknown = _vocabulary.unknown(_clean(names))
+    if not unknown:
+        return _vocabulary
+
+    with _lock:
+        if create:
+            Skill.objects.bulk_create([Skill(name=name) for name in unknown], ignore_conflicts=True)
+        for skill_id, name in Skill.objects.filter(name__in=unknown).values_list('id', 'name'):
+            _vocabulary.add(skill_id, name)
+    return _vocabulary
+
+
+def _load_ids(*bitmaps):
+    """Make sure the vocabulary can name every bit set in the bitmaps"""
+    missing = [skill_id for bits in bitmaps for skill_id in bit_ids(bits) if not _vocabulary.has_id(skill_id)]
+    if missing:
+        with _lock:
+            for skill_id, name in Skill.objects.filter(id__in=missing).values_list('id', 'name'):
+                _vocabulary.add(skill_id, name)
+
+
+def skill_bits(names, create=True):
+    """Bitmap of a list of skill names"""
+    names = _clean(names)
+    return get_vocabulary(names, create=create).bits(names)
+
+
+def resume_bits(resume):
+    """The resume's stored bitmap, or one compiled from parsed_data for unsaved/old rows"""
+    if resume.skill_bits:
+        return from_bytes(resume.skill_bits)
+    return skill_bits(resume.parsed_data.get('skills', []))
+
+
+def job_bits(job):
+    if job.skill_bits:
+        return from_bytes(job.skill_bits)
+    return skill_bits(job.required_skills)
+
+
+def compare_skills(resume, job):
+    """(matched_skills, missing_skills) of a resume against a job, by bitmap"""
+    resume_skills, job_skills = resume_bits(resume), job_bits(job)
+    _load_ids(resume_skills, job_skills)
+    return _vocabulary.compare(resume_skills, job_skills)
+
+
+def compare_skill_bits(resume_skill_bits, job_skill_bits):
+    """compare_skills for stored skill_bits values (bytes), e.g. from values_list()"""
+    resume_skills, job_skills = from_bytes(resume_skill_bits), from_bytes(job_skill_bits)
+    _load_ids(resume_skills, job_skills)
+    return _vocabulary.compare(resume_skills, job_skills)
+
+
+def skill_overlap(resume, job):
+    """Number of the job's required skills the resume has"""
+    return popcount(resume_bits(resume) & job_bits(job))
+
+
+def compile_resume_skills(resume):
+    resume.skill_bits = to_bytes(skill_bits(resume.parsed_data.get('skills', [])))
+
+
+def compile_job_skills(job):
+    job.skill_bits = to_bytes(skill_bits(job.required_skills))
+
+
+def sync_job_skill_rows(job):
+    """Make Job.skills match the job's bitmap"""
+    job.skills.set(bit_ids(from_bytes(job.skill_bits)))
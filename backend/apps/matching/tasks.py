@@ -0,0 +1,139 @@
+import logging
+
+from apps.tasks.queue import task
+from apps.resumes.models import Resume
+from apps.jobs.models import Job
+from .models import Match
+from .serializers import MatchSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def find_best_jobs(resume, matcher, limit):
+    """Top active jobs for a resume, looked up in the job vector index"""
+    from .embeddings import get_resume_embedding
+    from .vector_indexes import job_index
+    
+    # Over-fetch: jobs deactivated or deleted by other workers may still be indexed
+    hits = job_index.search(get_resume_embedding(resume, matcher), limit * 2)
+    if not hits:
+        # Nothing embedded yet
+        return list(Job.objects.filter(is_active=True)[:limit])
+    
+    jobs_by_id = Job.objects.filter(is_active=True).in_bulk([job_id for job_id, _ in hits])
+    return [jobs_by_id[job_id] for job_id, _ in hits if job_id in jobs_by_id][:limit]
+
+
+def match_resume(resume, job_ids, limit):
+    """
+    Score a resume against the given jobs (or the best active ones) and return serialized matches
+
+    Stored matches are reused while current. Jobs that fail to score are skipped.
+    """
+    from ai_engine.semantic_matcher import SemanticMatcher
+    from .embeddings import job_to_match_data, get_resume_embedding, get_job_embedding
+    from .invalidation import is_current, apply_match_result
+    from .skills import compare_skills
+    matcher = SemanticMatcher()
+    
+    # If no job_ids provided, match against the best of all active jobs
+    if not job_ids:
+        jobs = find_best_jobs(resume, matcher, limit)
+    else:
+        jobs = Job.objects.filter(id__in=job_ids, is_active=True)
+    
+    results = []
+    for job in jobs:
+        try:
+            # Reuse the existing match unless the resume or job changed since it was scored
+            existing_match = Match.objects.filter(resume=resume, job=job).first()
+            
+            if existing_match and is_current(existing_match, resume, job):
+                results.append(MatchSerializer(existing_match).data)
+                continue
+            
+            # Perform matching with error handling, reusing stored embeddings and skill bitmaps
+            match_result = matcher.match_resume_to_job(
+                resume.parsed_data,
+                job_to_match_data(job),
+                resume_embedding=get_resume_embedding(resume, matcher),
+                job_embedding=get_job_embedding(job, matcher),
+                skills=compare_skills(resume, job)
+            )
+            
+            # Save match
+            match = existing_match or Match(resume=resume, job=job)
+            apply_match_result(match, match_result, resume, job)
+            match.save()
+            
+            results.append(MatchSerializer(match).data)
+            
+        except MemoryError:
+            # Skip job if OOM - don't crash worker
+            logger.warning(f'MemoryError while matching job {job.id}')
+            continue
+        except Exception as e:
+            # Log other errors but continue processing
+            logger.error(f'Error matching job {job.id}: {str(e)}')
+            continue
+    
+    return results
+
+
+def match_resume_cascade(resume, job_ids, limit):
+    """
+    Match a resume through SemanticMatcher.cascade_match: a skill-overlap
+    prefilter over the given (or all active) jobs, stored-embedding similarity
+    for the survivors and a full match only for the best `limit`
+
+    Returns (serialized matches, cascade stats).
+    """
+    import numpy as np
+    from django.conf import settings
+    from ai_engine.semantic_matcher import SemanticMatcher
+    from .embeddings import job_to_match_data, get_resume_embedding, get_job_embeddings
+    from .invalidation import apply_match_result
+    matcher = SemanticMatcher()
+    
+    jobs = Job.objects.filter(is_active=True)
+    if job_ids:
+        jobs = jobs.filter(id__in=job_ids)
+    jobs = {job.id: job for job in jobs}
+    
+    def embed_jobs(items):
+        vectors = get_job_embeddings([jobs[item['id']] for item in items], matcher)
+        return np.array([vectors[item['id']] for item in items])
+    
+    results, stats = matcher.cascade_match(
+        [{'id': resume.id, 'resume_data': resume.parsed_data, 'embedding': get_resume_embedding(resume, matcher)}],
+        [{'id': job.id, 'job_data': job_to_match_data(job)} for job in jobs.values()],
+        shortlist_size=limit,
+        keep_fraction=settings.MATCH_CASCADE_KEEP_FRACTION,
+        job_embedder=embed_jobs,
+    )
+    
+    existing = {match.job_id: match for match in Match.objects.filter(resume=resume, job_id__in=[r['job_id'] for r in results])}
+    matches = []
+    for match_result in results:
+        job = jobs[match_result['job_id']]
+        match = existing.get(job.id) or Match(resume=resume, job=job)
+        apply_match_result(match, match_result, resume, job)
+        match.save()
+        matches.append(MatchSerializer(match).data)
+    
+    return matches, stats
+
+
+@task('matching.match_resume_to_jobs')
+def match_resume_to_jobs(resume_id, job_ids, limit, cascade=False):
+    resume = Resume.objects.get(id=resume_id)
+    if cascade:
+        matches, stats = match_resume_cascade(resume, job_ids, limit)
+        return {'matches': matches, 'cascade': stats}
+    return {'matches': match_resume(resume, job_ids, limit)}
+
+
+@task('matching.recompute_stale_matches')
+def recompute_stale_matches():
+    from .invalidation import recompute_stale_matches
+    return {'rescored': recompute_stale_matches()}
@@ -0,0 +1,241 @@
+"""
+Per-process vector indexes over stored embeddings.
+
+The database stays the source of truth. Each process loads the last
+snapshot from VECTOR_INDEX_DIR (memory-mapped), applies its own saves
+immediately through the post_save signals, and periodically pulls rows
+that other processes changed since the snapshot. When the unclustered tail
+grows large the snapshot is re-written under a file lock.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ai_engine.vector_index import VectorIndex
+from .models import ResumeEmbedding, JobEmbedding
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Rows updated this close to the last sync are re-read, to cover
+# transactions that committed slightly out of order.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+@contextmanager
+def _file_lock(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class EmbeddingIndex:
+    def __init__(self, name, embedding_model, owner_field, active_filter):
+        self.name = name
+        self.embedding_model = embedding_model
+        self.owner_field = owner_field
+        self.owner_model = embedding_model._meta.get_field(owner_field).related_model
+        self.active_filter = active_filter
+
+        self._index = None
+        self._synced_at = None
+        self._last_sync_check = 0.0
+        self._lock = threading.RLock()
+
+    @property
+    def directory(self):
+        return os.path.join(str(settings.VECTOR_INDEX_DIR), self.name)
+
+    def _index_options(self):
+        return {
+            'exact_threshold': settings.VECTOR_INDEX_EXACT_THRESHOLD,
+            'n_probe': settings.VECTOR_INDEX_N_PROBE,
+            'quantized': settings.VECTOR_INDEX_QUANTIZED,
+            'rerank_factor': settings.VECTOR_INDEX_RERANK_FACTOR,
+        }
+
+    def _new_index(self, dimensions):
+        return VectorIndex(dimensions, **self._index_options())
+
+    def _active_embeddings(self):
+        filters = {f'{self.owner_field}__{field}': value for field, value in self.active_filter.items()}
+        return self.embedding_model.objects.filter(**filters)
+
+    def _ensure_loaded(self):
+        if self._index is not None:
+            return
+
+        index = None
+        try:
+            index = VectorIndex.load(self.directory, **self._index_options())
+        except (OSError, ValueError) as e:
+            # A concurrent save replaced the snapshot while we were reading it
+            logger.warning(f'Could not load {self.name} index snapshot: {str(e)}')
+
+        if index is not None and index.metadata.get('synced_at'):
+            self._index = index
+            self._synced_at = parse_datetime(index.metadata['synced_at'])
+        else:
+            self._index, self._synced_at = self._build_from_database()
+
+    def _build_from_database(self, chunk_size=2000):
+        synced_at = timezone.now()
+        index = None
+        rows = self._active_embeddings().values_list(
+            f'{self.owner_field}_id', 'vector', 'dimensions', 'quantized_vector', 'scale'
+        )
+
+        batch = []
+        for row in rows.iterator(chunk_size=chunk_size):
+            if index is None:
+                index = self._new_index(row[2])
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                self._upsert_rows(index, batch)
+                batch = []
+
+        if index is not None and batch:
+            self._upsert_rows(index, batch)
+
+        return index, synced_at
+
+    @staticmethod
+    def _upsert_rows(index, rows):
+        """Upsert (owner_id, vector, dimensions, quantized_vector, scale) rows"""
+        import numpy as np
+        ids = [row[0] for row in rows]
+        vectors = np.frombuffer(b''.join(bytes(row[1]) for row in rows), dtype=np.float32)
+        codes = scales = None
+        if all(row[3] for row in rows):
+            codes = np.frombuffer(b''.join(bytes(row[3]) for row in rows), dtype=np.int8)
+            codes = codes.reshape(len(rows), index.dimensions)
+            scales = np.array([row[4] for row in rows], dtype=np.float32)
+        index.upsert(ids, vectors.reshape(len(rows), index.dimensions), codes, scales)
+
+    def _sync(self):
+        """Pull embeddings, deactivations and deletions written by other processes since the last sync"""
+        now = time.monotonic()
+        if now - self._last_sync_check < settings.VECTOR_INDEX_SYNC_SECONDS:
+            return
+        self._last_sync_check = now
+
+        since = self._synced_at - SYNC_OVERLAP
+        synced_at = timezone.now()
+
+        # Reactivated owners keep their old embedding row, so look at both timestamps
+        changed = self._active_embeddings().filter(
+            Q(updated_at__gte=since) | Q(**{f'{self.owner_field}__updated_at__gte': since})
+        )
+        rows = list(changed.values_list(
+            f'{self.owner_field}_id', 'vector', 'dimensions', 'quantized_vector', 'scale'
+        ))
+        if rows:
+            if self._index is None:
+                self._index = self._new_index(rows[0][2])
+            self._upsert_rows(self._index, rows)
+
+        if self._index is not None:
+            inactive = self.owner_model.objects.filter(updated_at__gte=since).exclude(**self.active_filter)
+            self._index.remove(list(inactive.values_list('id', flat=True)))
+            self._reconcile()
+
+        self._synced_at = synced_at
+        self._maybe_save()
+
+    def _reconcile(self):
+        """
+        Deleted rows leave nothing to sync from, so when the index and the
+        table disagree on size, compare their ids: drop those no longer in the
+        table and add any the index is missing
+        """
+        active = self._active_embeddings()
+        if len(self._index) == active.count():
+            return
+
+        stored = set(active.values_list(f'{self.owner_field}_id', flat=True))
+        indexed = set(self._index.ids())
+        self._index.remove(list(indexed - stored))
+        missing = stored - indexed
+        if missing:
+            rows = active.filter(**{f'{self.owner_field}_id__in': missing}).values_list(
+                f'{self.owner_field}_id', 'vector', 'dimensions', 'quantized_vector', 'scale'
+            )
+            self._upsert_rows(self._index, list(rows))
+
+    def _maybe_save(self):
+        index = self._index
+        if index is None or index.tail_size <= max(settings.VECTOR_INDEX_MAX_TAIL, len(index) // 10):
+            return
+        self.save()
+
+    def save(self):
+        """Write a compacted snapshot that other processes load at startup"""
+        with self._lock:
+            if self._index is None:
+                return
+            with _file_lock(self.directory + '.lock'):
+                self._index.save(self.directory, metadata={'synced_at': self._synced_at.isoformat()})
+
+    def search(self, vector, k=10):
+        """Return up to k (owner_id, score) pairs, best first"""
+        with self._lock:
+            self._ensure_loaded()
+            self._sync()
+            if self._index is None:
+                return []
+            return self._index.search(vector, k)
+
+    def upsert(self, owner_id, vector):
+        """Apply a local change; a process that has not loaded the index picks it up on load"""
+        with self._lock:
+            if self._index is not None:
+                self._index.upsert([owner_id], [vector])
+
+    @property
+    def is_loaded(self):
+        """Whether this process has loaded the index; until it does, local changes are read from the database on load"""
+        return self._index is not None
+
+    def is_indexed(self, owner_id):
+        """Whether the owner's vector is in this process's loaded index"""
+        with self._lock:
+            return self._index is not None and owner_id in self._index
+
+    def remove(self, owner_id):
+        with self._lock:
+            if self._index is not None:
+                self._index.remove([owner_id])
+
+    def rebuild(self):
+        """Rebuild from the database and write a fresh snapshot"""
+        with self._lock:
+            self._index, self._synced_at = self._build_from_database()
+            self.save()
+            return len(self._index) if self._index is not None else 0
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._index) if self._index is not None else 0
+
+
+job_index = EmbeddingIndex('jobs', JobEmbedding, 'job', {'is_active': True})
+resume_index = EmbeddingIndex('resumes', ResumeEmbedding, 'resume', {'is_processed': True})
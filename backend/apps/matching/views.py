@@ -3,9 +3,6 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from apps.resumes.models import Resume
-from apps.jobs.models import Job
-from .models import Match
-from .serializers import MatchSerializer
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -22,63 +19,30 @@ def match_resume_to_jobs(request):
     except Resume.DoesNotExist:
         return Response({'error': 'Resume not found'}, status=status.HTTP_404_NOT_FOUND)
     
-    # If no job_ids provided, match against all active jobs
-    if not job_ids:
-        jobs = Job.objects.filter(is_active=True)[:10]
-    else:
-        jobs = Job.objects.filter(id__in=job_ids, is_active=True)
+    try:
+        limit = max(1, min(int(request.data.get('limit', 10)), 100))
+    except (TypeError, ValueError):
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
     
-    results = []
+    # Skill prefilter -> embeddings -> full match for the best `limit` only
+    cascade = str(request.data.get('cascade', '')).lower() in ('1', 'true')
     
     try:
-        from ai_engine.semantic_matcher import SemanticMatcher
-        matcher = SemanticMatcher()
+        from apps.tasks.queue import is_enabled, enqueue
+        if is_enabled():
+            task = enqueue(
+                'matching.match_resume_to_jobs', user=request.user,
+                resume_id=resume.id, job_ids=list(job_ids), limit=limit, cascade=cascade
+            )
+            return Response({'task_id': task.id}, status=status.HTTP_202_ACCEPTED)
+        
+        if cascade:
+            from .tasks import match_resume_cascade
+            results, stats = match_resume_cascade(resume, job_ids, limit)
+            return Response({'matches': results, 'cascade': stats})
         
-        for job in jobs:
-            try:
-                # Check if match already exists
-                existing_match = Match.objects.filter(resume=resume, job=job).first()
-                
-                if existing_match:
-                    results.append(MatchSerializer(existing_match).data)
-                    continue
-                
-                # Perform matching with error handling
-                match_result = matcher.match_resume_to_job(
-                    resume.parsed_data,
-                    {
-                        'title': job.title,
-                        'description': job.description,
-                        'requirements': job.requirements,
-                        'required_skills': job.required_skills
-                    }
-                )
-                
-                # Save match
-                match = Match.objects.create(
-                    resume=resume,
-                    job=job,
-                    match_percentage=match_result['match_percentage'],
-                    matched_skills=match_result['matched_skills'],
-                    missing_skills=match_result['missing_skills'],
-                    heatmap=match_result['heatmap'],
-                    recommendation=match_result['recommendation']
-                )
-                
-                results.append(MatchSerializer(match).data)
-                
-            except MemoryError:
-                # Skip job if OOM - don't crash worker
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.warning(f'MemoryError while matching job {job.id}')
-                continue
-            except Exception as e:
-                # Log other errors but continue processing
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f'Error matching job {job.id}: {str(e)}')
-                continue
+        from .tasks import match_resume
+        results = match_resume(resume, job_ids, limit)
         
         return Response({'matches': results})
     
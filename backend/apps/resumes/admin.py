@@ -1,13 +1,23 @@
 from django.contrib import admin
-from .models import Resume, ResumeCorrection
+from .models import Resume, ResumeBatch, ResumeCorrection, ParsedResumeCache
 
 @admin.register(Resume)
 class ResumeAdmin(admin.ModelAdmin):
-    list_display = ['id', 'user', 'name', 'email', 'is_processed', 'created_at']
-    list_filter = ['is_processed', 'created_at']
+    list_display = ['id', 'user', 'name', 'email', 'status', 'is_processed', 'created_at']
+    list_filter = ['status', 'is_processed', 'created_at']
     search_fields = ['name', 'email', 'user__username']
 
 @admin.register(ResumeCorrection)
 class ResumeCorrectionAdmin(admin.ModelAdmin):
     list_display = ['id', 'resume', 'field_name', 'corrected_by', 'created_at']
     list_filter = ['field_name', 'created_at']
+
+@admin.register(ParsedResumeCache)
+class ParsedResumeCacheAdmin(admin.ModelAdmin):
+    list_display = ['id', 'content_hash', 'parser_version', 'hits', 'created_at', 'last_used_at']
+    search_fields = ['content_hash']
+
+@admin.register(ResumeBatch)
+class ResumeBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'status', 'total', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
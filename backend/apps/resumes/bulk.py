@@ -0,0 +1,364 @@
+"""
+Bulk resume uploads.
+
+A recruiter uploads a ZIP archive and/or many files in one request, of at
+most RESUME_BULK_MAX_MB in all. create_batch() stores the files, creating
+their resumes with bulk_create, status 'queued', and stores the archive
+as it is. ingest_batch() expands the archive in the background: its
+members are read one by one (never extracted together) into storage and
+given resumes the same way.
+
+ingest_batch() then parses the files across a pool of RESUME_BULK_WORKERS
+processes (by default one per CPU available to this process, at most
+MAX_AUTO_WORKERS) with a bounded number of files and bytes in flight, and
+saves and embeds the parsed resumes CHUNK_SIZE at a time with
+bulk updates. Identical files in a batch, and files in the parse cache,
+are parsed once.
+
+The batch's report lists each file with its resume, or why it was
+rejected, up to twice RESUME_BULK_MAX_FILES files; the resume statuses show
+how far each file got.
+"""
+import logging
+import multiprocessing
+import os
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import parse_cache
+from .ingestion import PARSED_FIELDS, _get_executor, _parser_version, apply_parsed, parser_limits, transition_many
+from .models import Resume, ResumeBatch
+
+logger = logging.getLogger(__name__)
+
+# File types the parser reads; anything else would go to OCR
+EXTENSIONS = {'.pdf', '.docx', '.doc', '.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp'}
+
+# Parsed resumes saved and embedded together
+CHUNK_SIZE = 50
+
+# Each parser process loads its own models; without RESUME_BULK_WORKERS use
+# no more than this many
+MAX_AUTO_WORKERS = 4
+
+# File bytes handed to the parser processes at once (at least one file)
+MAX_IN_FLIGHT_BYTES = 64 * 2**20
+
+
+class BulkUploadError(Exception):
+    """An upload rejected as a whole"""
+
+
+def iter_entries(files=(), archive=None):
+    """
+    (name, size, read) for each uploaded file, then for each member of a ZIP
+    archive; read() returns the file's contents
+    """
+    for upload in files:
+        yield upload.name, upload.size, upload.read
+    if archive is None:
+        return
+
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            name = os.path.basename(info.filename)
+            # Skip folders, hidden files and the metadata macOS adds to archives
+            if info.is_dir() or info.filename.startswith('__MACOSX/') or not name or name.startswith('.'):
+                continue
+            yield name, info.file_size, lambda info=info: zf.read(info)
+
+
+def _add_entries(batch, entries):
+    """
+    Store each accepted entry and return [(report entry, unsaved resume)]
+    for _create_resumes(); the batch's report and total are updated in
+    memory
+
+    Unsupported, empty and oversized files, files past RESUME_BULK_MAX_FILES
+    and files past RESUME_BULK_MAX_MB of stored entries are rejected without
+    being stored. Rejected files past twice RESUME_BULK_MAX_FILES report
+    entries are counted in the batch's error rather than listed.
+    """
+    max_bytes = settings.RESUME_MAX_FILE_MB * 2**20
+    max_total = settings.RESUME_BULK_MAX_MB * 2**20
+    max_files = settings.RESUME_BULK_MAX_FILES
+    file_field = Resume._meta.get_field('file')
+
+    accepted = sum(1 for entry in batch.report if entry['resume_id'] is not None)
+    created = []
+    stored = 0
+    for name, size, read in entries:
+        batch.total += 1
+        ext = os.path.splitext(name)[1].lower()
+        data = None
+        if ext not in EXTENSIONS:
+            error = 'Unsupported file type'
+        elif accepted + len(created) >= max_files:
+            error = f'Only {max_files} files are accepted per upload'
+        elif size > max_bytes:
+            error = f'File is {size} bytes; the limit is {max_bytes}'
+        elif stored + size > max_total:
+            # Archive members can expand to far more than the upload
+            error = f'Files are over {max_total} bytes in all'
+        else:
+            try:
+                data = read()
+                error = '' if data else 'File is empty'
+            except (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError) as e:
+                # Corrupt, encrypted or unsupported compression
+                error = f'Could not read the file from the archive: {str(e)}'
+
+        entry = {'file': name, 'resume_id': None, 'error': error}
+        if error:
+            if len(batch.report) < 2 * max_files:
+                batch.report.append(entry)
+            continue
+
+        batch.report.append(entry)
+        stored += len(data)
+        stored_name = file_field.storage.save(file_field.generate_filename(None, name), ContentFile(data))
+        created.append((entry, Resume(user=batch.user, batch=batch, file=stored_name, file_type=ext[1:],
+                                      content_hash=parse_cache.content_hash(data))))
+
+    return created
+
+
+def _create_resumes(batch, created):
+    """Create the resumes _add_entries() returned and save the batch's report"""
+    Resume.objects.bulk_create([resume for _, resume in created], batch_size=100)
+    for entry, resume in created:
+        entry['resume_id'] = resume.id
+    if batch.total > len(batch.report):
+        batch.error = f'{batch.total - len(batch.report)} more files were rejected and are not listed'
+    batch.save(update_fields=['total', 'report', 'error', 'archive'])
+
+
+def create_batch(user, files=(), archive=None):
+    """
+    Store the uploaded files and create their resumes, owned by user, and
+    store the archive for ingest_batch() to expand
+
+    Returns the batch ('queued'), with a report entry for each file. Raises
+    BulkUploadError if the upload is larger than RESUME_BULK_MAX_MB.
+    """
+    max_total = settings.RESUME_BULK_MAX_MB * 2**20
+    size = sum(upload.size for upload in files) + (archive.size if archive is not None else 0)
+    if size > max_total:
+        raise BulkUploadError(f'Upload is {size} bytes; the limit is {max_total}')
+
+    batch = ResumeBatch.objects.create(user=user)
+    created = _add_entries(batch, iter_entries(files))
+    if archive is not None:
+        batch.archive.save(os.path.basename(archive.name), archive, save=False)
+    _create_resumes(batch, created)
+    return batch
+
+
+def _expand_archive(batch):
+    """Store the members of the batch's archive, creating their resumes, then delete the archive"""
+    archive = batch.archive
+    created = []
+    with archive.open('rb') as f:
+        try:
+            created = _add_entries(batch, iter_entries(archive=f))
+        except zipfile.BadZipFile as e:
+            batch.error = f'Could not read the archive: {str(e)}'
+
+    # Only the database writes: the resumes and the emptied archive field
+    # are saved together, so a retry never expands the archive twice
+    with transaction.atomic():
+        batch.archive = ''
+        _create_resumes(batch, created)
+    archive.storage.delete(archive.name)
+
+
+def _default_workers():
+    try:
+        # CPUs this process may run on, which can be fewer than the machine's
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS
+        cpus = os.cpu_count() or 1
+    return min(cpus, MAX_AUTO_WORKERS)
+
+
+def _source(resume):
+    """(path or contents, file name) of a stored resume, to parse it in another process"""
+    try:
+        return resume.file.path, resume.file.name
+    except NotImplementedError:
+        with resume.file.open('rb') as f:
+            return f.read(), resume.file.name
+
+
+def _save_chunk(resumes, results):
+    """Save the parse results of some resumes of a batch and embed those that parsed"""
+    from apps.matching.embeddings import get_resume_embeddings
+    from apps.matching.skills import compile_resume_skills
+    from apps.matching.vector_indexes import resume_index
+
+    now = timezone.now()
+    parsed = []
+    failed = []
+    for resume in resumes:
+        result = results[resume.content_hash]
+        if isinstance(result, Exception):
+            resume.processing_error = str(result) or type(result).__name__
+            failed.append(resume)
+        else:
+            apply_parsed(resume, resume.content_hash, result)
+            # bulk_update does not send the pre_save signal that compiles these
+            compile_resume_skills(resume)
+            resume.updated_at = now
+            parsed.append(resume)
+
+    transition_many(failed, 'failed', ['processing_error'])
+    transition_many(parsed, 'embedding', [*PARSED_FIELDS, 'skill_bits', 'updated_at'])
+
+    try:
+        vectors = get_resume_embeddings(parsed)
+    except Exception as e:
+        for resume in parsed:
+            resume.processing_error = str(e)
+        transition_many(parsed, 'failed', ['processing_error'])
+        return
+    for resume_id, vector in vectors.items():
+        resume_index.upsert(resume_id, vector)
+    transition_many(parsed, 'done')
+
+
+def _parse_batch(resumes):
+    from ai_engine.resume_parser import parse_file
+
+    version = _parser_version()
+    # One process per file: no page pool inside the workers
+    limits = {**parser_limits(), 'workers': 1}
+    skills_file = settings.SKILL_TAXONOMY_FILE or None
+    workers = settings.RESUME_BULK_WORKERS or _default_workers()
+
+    by_hash = {}
+    for resume in resumes:
+        by_hash.setdefault(resume.content_hash, []).append(resume)
+
+    results = {}
+
+    def save(ready):
+        _save_chunk(ready, results)
+        # Keep only the results of resumes not saved yet
+        for resume in ready:
+            results.pop(resume.content_hash, None)
+
+    todo = []
+    ready = []
+    for digest in by_hash:
+        parsed_data = parse_cache.lookup(digest, version)
+        if parsed_data is None:
+            todo.append(digest)
+            continue
+        results[digest] = parsed_data
+        ready.extend(by_hash[digest])
+        if len(ready) >= CHUNK_SIZE:
+            save(ready)
+            ready = []
+    if ready:
+        save(ready)
+    if not todo:
+        return
+
+    ready = []
+    todo.reverse()
+    with ProcessPoolExecutor(max_workers=min(workers, len(todo)),
+                             mp_context=multiprocessing.get_context('spawn')) as pool:
+        pending = {}
+        in_flight = 0
+        while todo or pending:
+            # Read files as workers free up, rather than the whole batch at once
+            while todo and len(pending) < workers * 2:
+                resume = by_hash[todo[-1]][0]
+                if pending and in_flight + resume.file.size > MAX_IN_FLIGHT_BYTES:
+                    break
+                digest = todo.pop()
+                source, file_name = _source(resume)
+                pending[pool.submit(parse_file, source, file_name, skills_file, limits)] = (digest, resume.file.size)
+                in_flight += resume.file.size
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                digest, size = pending.pop(future)
+                in_flight -= size
+                try:
+                    results[digest] = future.result()
+                except Exception as e:
+                    results[digest] = e
+                else:
+                    parse_cache.store(digest, version, results[digest])
+                ready.extend(by_hash[digest])
+
+            if len(ready) >= CHUNK_SIZE or not (todo or pending):
+                save(ready)
+                ready = []
+
+
+def ingest_batch(batch):
+    """
+    Expand the batch's archive, if it has not been, then parse, save and
+    embed the unfinished resumes of the batch
+
+    Files that fail leave their resume 'failed'; the batch fails (and the
+    exception is re-raised) only if the batch itself cannot be processed.
+    """
+    ResumeBatch.objects.filter(pk=batch.pk).update(status='running')
+    try:
+        if batch.archive:
+            _expand_archive(batch)
+        resumes = list(batch.resumes.filter(status__in=['queued', 'parsing', 'embedding']).order_by('id'))
+        # Resumes left mid-way by an earlier run start over
+        transition_many([resume for resume in resumes if resume.status != 'queued'], 'queued')
+        transition_many(resumes, 'parsing')
+        _parse_batch(resumes)
+        batch.status = 'done'
+    except Exception as e:
+        batch.status = 'failed'
+        batch.error = str(e)
+        raise
+    finally:
+        batch.finished_at = timezone.now()
+        batch.save(update_fields=['status', 'error', 'finished_at'])
+
+
+def _ingest_batch_in_background(batch_id):
+    try:
+        ingest_batch(ResumeBatch.objects.get(id=batch_id))
+    except ResumeBatch.DoesNotExist:
+        pass
+    except Exception as e:
+        logger.error(f'Error ingesting resume batch {batch_id}: {str(e)}')
+    finally:
+        connection.close()
+
+
+def submit_batch(batch, user=None):
+    """
+    Start ingesting a batch, like ingestion.submit() does a resume
+
+    Returns the queued Task when the task queue is enabled, else None.
+    """
+    from apps.tasks.queue import is_enabled, enqueue
+    if is_enabled():
+        return enqueue('resumes.ingest_batch', user=user, batch_id=batch.id)
+
+    if settings.RESUME_INGEST_ASYNC:
+        batch_id = batch.id
+        transaction.on_commit(lambda: _get_executor().submit(_ingest_batch_in_background, batch_id))
+        return None
+
+    try:
+        ingest_batch(batch)
+    except Exception as e:
+        logger.error(f'Error ingesting resume batch {batch.id}: {str(e)}')
+    return None
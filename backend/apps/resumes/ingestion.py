@@ -0,0 +1,267 @@
+"""
+Resume ingestion: upload -> parse -> embed, as a small state machine.
+
+    queued -> parsing -> embedding -> done
+
+Any stage can end in 'failed'; 'done' and 'failed' resumes go back to
+'queued' when they are ingested again.
+
+Uploads return as soon as the file is stored (status 'queued'); submit()
+hands the resume to the task queue when it is enabled, otherwise to a pool
+of RESUME_INGEST_WORKERS threads in this process. Every transition is a
+single UPDATE, so clients polling the resume see the current stage, and the
+time spent in each stage is recorded in stage_timings (milliseconds).
+
+In this process, parse_upload() starts parsing the uploaded bytes while the
+view is still writing them to storage; otherwise the file is read back from
+storage, which works for any storage backend. Files parsed before, by
+content hash, reuse the cached result (apps.resumes.parse_cache).
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import parse_cache
+from .models import Resume
+
+logger = logging.getLogger(__name__)
+
+TRANSITIONS = {
+    'queued': {'parsing', 'failed'},
+    'parsing': {'embedding', 'failed', 'queued'},
+    'embedding': {'done', 'failed', 'queued'},
+    'done': {'queued'},
+    'failed': {'queued'},
+}
+
+# Resume fields set from a parse result by apply_parsed()
+PARSED_FIELDS = ['content_hash', 'parsed_data', 'name', 'email', 'phone', 'is_processed', 'processing_error']
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _stage_fields(resume, status, now):
+    if status not in TRANSITIONS[resume.status]:
+        raise ValueError(f'Resume {resume.id} cannot go from {resume.status} to {status}')
+
+    if status == 'queued':
+        # A new ingestion run
+        timings = {}
+    else:
+        timings = dict(resume.stage_timings)
+        timings[resume.status] = round((now - resume.status_changed_at).total_seconds() * 1000, 2)
+    return {'status': status, 'status_changed_at': now, 'stage_timings': timings}
+
+
+def transition(resume, status, **fields):
+    """
+    Move the resume to `status`, recording the time spent in its current
+    stage, and save the status with any extra fields in one UPDATE
+    """
+    fields.update(_stage_fields(resume, status, timezone.now()))
+    Resume.objects.filter(pk=resume.pk).update(**fields)
+    for name, value in fields.items():
+        setattr(resume, name, value)
+
+
+def transition_many(resumes, status, fields=()):
+    """
+    transition() for many resumes in one bulk UPDATE; `fields` names other
+    attributes already set on the resumes to save with the status
+    """
+    now = timezone.now()
+    for resume in resumes:
+        for name, value in _stage_fields(resume, status, now).items():
+            setattr(resume, name, value)
+    Resume.objects.bulk_update(resumes, ['status', 'status_changed_at', 'stage_timings', *fields], batch_size=500)
+
+
+def parser_limits():
+    """ResumeParser limits from settings"""
+    return {
+        'max_bytes': settings.RESUME_MAX_FILE_MB * 2**20,
+        'max_pages': settings.RESUME_PDF_MAX_PAGES,
+        'timeout': settings.RESUME_PARSE_TIMEOUT_SECONDS,
+        'parallel_pages': settings.RESUME_PDF_PARALLEL_PAGES,
+        'workers': settings.RESUME_PDF_WORKERS,
+        'ocr_dpi': settings.RESUME_OCR_DPI,
+        'ocr_page_timeout': settings.RESUME_OCR_PAGE_TIMEOUT_SECONDS,
+    }
+
+
+def _parser_version():
+    from ai_engine.resume_parser import parser_version
+    return parser_version(limits=parser_limits())
+
+
+def _parse(source, file_name=None):
+    from ai_engine.resume_parser import ResumeParser
+    return ResumeParser(limits=parser_limits()).parse_resume(source, file_name)
+
+
+def _parse_uncached(source, file_name=None):
+    return _parse(source, file_name), False
+
+
+def _parse_stored(resume):
+    """
+    (content_hash, parsed_data, from_cache) for the resume's stored file,
+    parsed by path when the storage is local
+    """
+    from ai_engine.resume_parser import ParseLimitError
+    max_bytes = settings.RESUME_MAX_FILE_MB * 2**20
+    if resume.file.size > max_bytes:
+        raise ParseLimitError(f'File is {resume.file.size} bytes; the limit is {max_bytes}')
+
+    try:
+        path = resume.file.path
+    except NotImplementedError:
+        path = None
+
+    with resume.file.open('rb') as f:
+        if path:
+            digest = parse_cache.file_content_hash(f)
+        else:
+            data = f.read()
+            digest = parse_cache.content_hash(data)
+
+    parsed_data = parse_cache.lookup(digest, _parser_version())
+    if parsed_data is not None:
+        return digest, parsed_data, True
+    return digest, _parse(path) if path else _parse(data, resume.file.name), False
+
+
+def parse_upload(upload):
+    """
+    Start parsing an uploaded file from memory in the ingestion pool
+
+    Returns (content_hash, Future of (parsed_data, from_cache)) to pass to
+    submit(); the Future is already done when the file is in the parse
+    cache. Returns None when the resume will be parsed elsewhere (task
+    queue) or from storage (files over the size limit, which then fail
+    there without being read in full).
+    """
+    from apps.tasks.queue import is_enabled
+    if is_enabled() or upload.size > settings.RESUME_MAX_FILE_MB * 2**20:
+        return None
+
+    data = upload.read()
+    upload.seek(0)
+    digest = parse_cache.content_hash(data)
+
+    parsed_data = parse_cache.lookup(digest, _parser_version())
+    if parsed_data is not None:
+        future = Future()
+        future.set_result((parsed_data, True))
+        return digest, future
+    return digest, _get_executor().submit(_parse_uncached, data, upload.name)
+
+
+def apply_parsed(resume, digest, parsed_data):
+    """Set the PARSED_FIELDS of a resume from its file's hash and parse result, without saving"""
+    resume.content_hash = digest
+    resume.parsed_data = parsed_data
+    resume.name = parsed_data.get('name', '')
+    resume.email = parsed_data.get('email', '')
+    resume.phone = parsed_data.get('phone', '')
+    resume.is_processed = True
+    resume.processing_error = ''
+
+
+def ingest(resume, parsed=None):
+    """
+    Parse and embed a resume, moving it through the ingestion stages
+
+    parsed is the optional result of parse_upload(); without it the stored
+    file is parsed. Fresh parse results are added to the parse cache.
+    Restarts from 'queued' if the resume was ingested before. On failure the resume is left 'failed' with the error in
+    processing_error and the exception is re-raised.
+    """
+    from apps.matching.embeddings import get_resume_embedding
+
+    if resume.status != 'queued':
+        transition(resume, 'queued', processing_error='')
+
+    try:
+        transition(resume, 'parsing')
+        if parsed is not None:
+            digest, future = parsed
+            parsed_data, from_cache = future.result()
+        else:
+            digest, parsed_data, from_cache = _parse_stored(resume)
+        if digest and not from_cache:
+            parse_cache.store(digest, _parser_version(), parsed_data)
+
+        transition(resume, 'embedding')
+        apply_parsed(resume, digest, parsed_data)
+        # Saving embeds the resume (apps.matching.signals), which logs rather
+        # than raises; fetching the embedding surfaces any failure here
+        resume.save()
+        get_resume_embedding(resume)
+
+        transition(resume, 'done')
+    except Exception as e:
+        transition(resume, 'failed', processing_error=str(e))
+        raise
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.RESUME_INGEST_WORKERS,
+                                           thread_name_prefix='resume-ingest')
+        return _executor
+
+
+def _ingest_in_background(resume_id, parsed=None):
+    try:
+        ingest(Resume.objects.get(id=resume_id), parsed)
+    except Resume.DoesNotExist:
+        pass
+    except Exception as e:
+        logger.error(f'Error ingesting resume {resume_id}: {str(e)}')
+    finally:
+        connection.close()
+
+
+def submit(resume, user=None, parsed=None):
+    """
+    Start ingesting a stored resume without waiting for it
+
+    parsed is the resume's parse_upload() result, if any. Returns the
+    queued Task when the task queue is enabled, else None. With
+    RESUME_INGEST_ASYNC off the resume is ingested before this returns.
+    """
+    from apps.tasks.queue import is_enabled, enqueue
+    if is_enabled():
+        return enqueue('resumes.parse_resume', user=user, resume_id=resume.id)
+
+    if settings.RESUME_INGEST_ASYNC:
+        resume_id = resume.id
+        # The pool runs jobs in submission order, so a parse this ingestion
+        # waits for has always started before it
+        transaction.on_commit(lambda: _get_executor().submit(_ingest_in_background, resume_id, parsed))
+        return None
+
+    try:
+        ingest(resume, parsed)
+    except Exception as e:
+        logger.error(f'Error ingesting resume {resume.id}: {str(e)}')
+    return None
+
+
+def stuck_resumes(older_than_seconds):
+    """
+    Resumes left 'queued', 'parsing' or 'embedding' for longer than
+    older_than_seconds, e.g. by a process that was restarted mid-parse
+    """
+    cutoff = timezone.now() - timedelta(seconds=older_than_seconds)
+    return list(Resume.objects.filter(status__in=['queued', 'parsing', 'embedding'],
+                                      status_changed_at__lt=cutoff))
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.resumes.bulk import ingest_batch
+from apps.resumes.ingestion import ingest, stuck_resumes
+from apps.resumes.models import Resume, ResumeBatch
+
+
+class Command(BaseCommand):
+    help = ('Ingest resumes whose ingestion never finished (e.g. the process was restarted), '
+            'and optionally those that failed')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stuck-minutes', type=int, default=15,
+                            help='Minutes a resume may stay queued/parsing/embedding before it is retried')
+        parser.add_argument('--failed', action='store_true', help='Also retry failed resumes')
+
+    def handle(self, *args, **options):
+        # Bulk uploads whose archive was never expanded
+        cutoff = timezone.now() - timedelta(minutes=options['stuck_minutes'])
+        for batch in ResumeBatch.objects.exclude(archive='').filter(created_at__lt=cutoff):
+            try:
+                ingest_batch(batch)
+            except Exception as e:
+                self.stderr.write(f'Resume batch {batch.id} failed: {str(e)}')
+
+        resumes = stuck_resumes(options['stuck_minutes'] * 60)
+        if options['failed']:
+            resumes += list(Resume.objects.filter(status='failed'))
+
+        done = 0
+        for resume in resumes:
+            try:
+                ingest(resume)
+                done += 1
+            except Exception as e:
+                self.stderr.write(f'Resume {resume.id} failed: {str(e)}')
+        self.stdout.write(self.style.SUCCESS(f'Ingested {done}/{len(resumes)} resumes'))
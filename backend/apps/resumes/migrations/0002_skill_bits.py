@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:51
+
+from django.db import migrations, models
+
+
+# Frozen copies of ai_engine.skill_bits as of this migration, so rerunning it
+# gives the same result whatever the skill taxonomy says later
+def normalize(name):
+    return name.strip().lower()
+
+
+def to_bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def compile_resume_skills(apps, schema_editor):
+    Skill = apps.get_model('matching', 'Skill')
+    Resume = apps.get_model('resumes', 'Resume')
+    ids = dict(Skill.objects.values_list('name', 'id'))
+
+    resumes = []
+    for resume in Resume.objects.order_by('id').iterator(chunk_size=500):
+        skills = resume.parsed_data.get('skills', []) if isinstance(resume.parsed_data, dict) else []
+        names = {normalize(name) for name in skills if isinstance(name, str)}
+        names = {name for name in names if 0 < len(name) <= 100}
+        new = names - ids.keys()
+        if new:
+            Skill.objects.bulk_create([Skill(name=name) for name in new], ignore_conflicts=True)
+            ids.update(Skill.objects.filter(name__in=new).values_list('name', 'id'))
+
+        bits = 0
+        for name in names:
+            bits |= 1 << ids[name]
+        resume.skill_bits = to_bytes(bits)
+        resumes.append(resume)
+        if len(resumes) == 500:
+            Resume.objects.bulk_update(resumes, ['skill_bits'])
+            resumes = []
+    Resume.objects.bulk_update(resumes, ['skill_bits'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0005_skill_vocabulary'),
+        ('resumes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='skill_bits',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(compile_resume_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:57
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def set_status(apps, schema_editor):
+    Resume = apps.get_model('resumes', 'Resume')
+    Resume.objects.filter(is_processed=True).update(status='done')
+    Resume.objects.filter(is_processed=False).exclude(processing_error='').update(status='failed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0002_skill_bits'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='stage_timings',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('parsing', 'Parsing'), ('embedding', 'Embedding'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='status_changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(set_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0005_resume_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumebatch',
+            name='archive',
+            field=models.FileField(blank=True, upload_to='resume_batches/'),
+        ),
+    ]
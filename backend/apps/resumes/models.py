@@ -1,18 +1,37 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Resume(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('parsing', 'Parsing'),
+        ('embedding', 'Embedding'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='resumes')
     file = models.FileField(upload_to='resumes/')
     file_type = models.CharField(max_length=10)
+    # SHA-256 of the file's bytes (see apps.resumes.parse_cache)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    # Bulk upload the resume came in (see apps.resumes.bulk)
+    batch = models.ForeignKey('ResumeBatch', on_delete=models.SET_NULL, null=True, blank=True, related_name='resumes')
     
     # Parsed data
     parsed_data = models.JSONField(default=dict)
     name = models.CharField(max_length=200, blank=True)
     email = models.EmailField(blank=True)
     phone = models.CharField(max_length=20, blank=True)
+    # parsed_data['skills'] compiled against the skill vocabulary (see apps.matching.skills)
+    skill_bits = models.BinaryField(default=b'', editable=False)
     
-    # Processing status
+    # Processing status (see apps.resumes.ingestion)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', db_index=True)
+    status_changed_at = models.DateTimeField(default=timezone.now)
+    # Milliseconds spent in each stage of the last ingestion
+    stage_timings = models.JSONField(default=dict, blank=True)
     is_processed = models.BooleanField(default=False)
     processing_error = models.TextField(blank=True)
     
@@ -26,6 +45,48 @@ class Resume(models.Model):
     def __str__(self):
         return f"Resume {self.id} - {self.name or self.user.username}"
 
+class ResumeBatch(models.Model):
+    """A bulk upload of resumes (see apps.resumes.bulk)"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='resume_batches')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total = models.PositiveIntegerField(default=0)
+    # One {'file', 'resume_id', 'error'} per uploaded file, in upload order;
+    # resume_id is None for files that were rejected
+    report = models.JSONField(default=list)
+    error = models.TextField(blank=True)
+    # The uploaded ZIP archive, until ingestion has expanded it
+    archive = models.FileField(upload_to='resume_batches/', blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'resume_batches'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Resume batch {self.id} ({self.status})"
+
+class ParsedResumeCache(models.Model):
+    """parsed_data of a file, by the file's SHA-256 and the parser version that produced it"""
+    content_hash = models.CharField(max_length=64)
+    parser_version = models.CharField(max_length=64)
+    parsed_data = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        db_table = 'parsed_resume_cache'
+        unique_together = ['content_hash', 'parser_version']
+
 class ResumeCorrection(models.Model):
     resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='corrections')
     corrected_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
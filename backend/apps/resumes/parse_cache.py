@@ -0,0 +1,59 @@
+"""
+Parse results cached by file content.
+
+Re-uploads of the same file (and reparses of an unchanged one) reuse the
+parsed_data stored under the SHA-256 of the file's bytes and the parser
+version, instead of running the parser again. The table holds at most
+RESUME_PARSE_CACHE_SIZE entries; the least recently used are evicted.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ParsedResumeCache
+
+
+def content_hash(data):
+    """SHA-256 of bytes-like data"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_content_hash(f, chunk_size=2**20):
+    """SHA-256 of a binary file object, read chunk by chunk"""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(chunk_size), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def lookup(digest, version):
+    """Cached parsed_data for a file hash and parser version, or None"""
+    if not settings.RESUME_PARSE_CACHE_SIZE:
+        return None
+    entry = ParsedResumeCache.objects.filter(content_hash=digest, parser_version=version).first()
+    if entry is None:
+        return None
+    ParsedResumeCache.objects.filter(pk=entry.pk).update(hits=F('hits') + 1, last_used_at=timezone.now())
+    return entry.parsed_data
+
+
+def store(digest, version, parsed_data):
+    """Cache a parse result, evicting the least recently used entries over the size cap"""
+    max_entries = settings.RESUME_PARSE_CACHE_SIZE
+    if not max_entries:
+        return
+    try:
+        with transaction.atomic():
+            ParsedResumeCache.objects.create(content_hash=digest, parser_version=version,
+                                             parsed_data=parsed_data)
+    except IntegrityError:
+        # Parsed and stored concurrently by another worker
+        return
+
+    excess = ParsedResumeCache.objects.count() - max_entries
+    if excess > 0:
+        oldest = list(ParsedResumeCache.objects.order_by('last_used_at').values_list('id', flat=True)[:excess])
+        ParsedResumeCache.objects.filter(id__in=oldest).delete()
@@ -1,14 +1,46 @@
+from collections import Counter
 from rest_framework import serializers
-from .models import Resume, ResumeCorrection
+from .models import Resume, ResumeBatch, ResumeCorrection
 
 class ResumeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Resume
         fields = ['id', 'file', 'file_type', 'parsed_data', 'name', 'email', 'phone', 
-                  'is_processed', 'processing_error', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'parsed_data', 'is_processed', 'processing_error', 
+                  'status', 'stage_timings', 'is_processed', 'processing_error', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'parsed_data', 'status', 'stage_timings', 'is_processed', 'processing_error', 
                             'created_at', 'updated_at', 'name', 'email', 'phone']
 
+class ResumeBatchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ResumeBatch
+        fields = ['id', 'status', 'total', 'error', 'created_at', 'finished_at']
+        read_only_fields = fields
+    
+    def to_representation(self, instance):
+        """
+        The batch with its report: each file's resume status (or 'rejected')
+        and error, and the number of files in each status
+        """
+        data = super().to_representation(instance)
+        resumes = {
+            resume_id: (resume_status, error)
+            for resume_id, resume_status, error in
+            Resume.objects.filter(batch=instance).values_list('id', 'status', 'processing_error')
+        }
+        
+        files = []
+        for entry in instance.report:
+            if entry['resume_id'] is None:
+                file_status, error = 'rejected', entry['error']
+            else:
+                file_status, error = resumes.get(entry['resume_id'], ('deleted', ''))
+            files.append({'file': entry['file'], 'resume_id': entry['resume_id'],
+                          'status': file_status, 'error': error})
+        
+        data['counts'] = dict(Counter(file['status'] for file in files))
+        data['files'] = files
+        return data
+
 class ResumeCorrectionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ResumeCorrection
@@ -0,0 +1,19 @@
+from apps.tasks.queue import task
+from .bulk import ingest_batch as ingest_resume_batch
+from .ingestion import ingest
+from .models import Resume, ResumeBatch
+from .serializers import ResumeBatchSerializer
+
+
+@task('resumes.parse_resume')
+def parse_resume(resume_id):
+    resume = Resume.objects.get(id=resume_id)
+    ingest(resume)
+    return {'resume_id': resume.id, 'status': resume.status, 'stage_timings': resume.stage_timings}
+
+
+@task('resumes.ingest_batch')
+def ingest_batch(batch_id):
+    batch = ResumeBatch.objects.get(id=batch_id)
+    ingest_resume_batch(batch)
+    return {'batch_id': batch.id, 'status': batch.status, 'counts': ResumeBatchSerializer(batch).data['counts']}
@@ -2,8 +2,9 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from .models import Resume
-from .serializers import ResumeSerializer
+from .models import Resume, ResumeBatch
+from .serializers import ResumeSerializer, ResumeBatchSerializer
+from .ingestion import ingest, parse_upload, submit
 
 class ResumeViewSet(viewsets.ModelViewSet):
     serializer_class = ResumeSerializer
@@ -14,42 +15,79 @@ class ResumeViewSet(viewsets.ModelViewSet):
             return Resume.objects.all()
         return Resume.objects.filter(user=self.request.user)
     
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        
+        # The resume is stored; poll it (or the task) for the ingestion status
+        task = getattr(self, '_parse_task', None)
+        if task is not None:
+            response.data['task_id'] = task.id
+        if response.data['status'] in ('queued', 'parsing', 'embedding'):
+            response.status_code = status.HTTP_202_ACCEPTED
+        return response
+    
     def perform_create(self, serializer):
+        # Parse from the upload buffer while the file is written to storage
+        parsed = parse_upload(serializer.validated_data['file'])
         resume = serializer.save(user=self.request.user)
-        
-        # Parse resume asynchronously (or synchronously for now)
-        try:
-            from ai_engine.resume_parser import ResumeParser
-            parser = ResumeParser()
-            parsed_data = parser.parse_resume(resume.file.path)
-            
-            resume.parsed_data = parsed_data
-            resume.name = parsed_data.get('name', '')
-            resume.email = parsed_data.get('email', '')
-            resume.phone = parsed_data.get('phone', '')
-            resume.is_processed = True
-            resume.save()
-        except Exception as e:
-            resume.processing_error = str(e)
-            resume.save()
+        self._parse_task = submit(resume, user=self.request.user, parsed=parsed)
     
     @action(detail=True, methods=['post'])
     def reparse(self, request, pk=None):
         resume = self.get_object()
         
         try:
-            from ai_engine.resume_parser import ResumeParser
-            parser = ResumeParser()
-            parsed_data = parser.parse_resume(resume.file.path)
-            
-            resume.parsed_data = parsed_data
-            resume.name = parsed_data.get('name', '')
-            resume.email = parsed_data.get('email', '')
-            resume.phone = parsed_data.get('phone', '')
-            resume.is_processed = True
-            resume.processing_error = ''
-            resume.save()
+            ingest(resume)
             
             return Response(ResumeSerializer(resume).data)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Upload many resumes at once: a ZIP archive (`archive`) and/or
+        several files (`files`, repeated)
+        
+        Returns the batch with a report entry per file; while it is being
+        ingested (202), poll batches/{id}/ for its progress. The archive's
+        files are listed once ingestion has expanded it.
+        """
+        if request.user.role not in ['recruiter', 'admin']:
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        import zipfile
+        from .bulk import BulkUploadError, create_batch, submit_batch
+        files = request.FILES.getlist('files')
+        archive = request.FILES.get('archive')
+        if not files and archive is None:
+            return Response({'error': 'Upload an archive or files'}, status=status.HTTP_400_BAD_REQUEST)
+        if archive is not None and not zipfile.is_zipfile(archive):
+            return Response({'error': 'archive must be a ZIP file'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            batch = create_batch(request.user, files, archive)
+        except BulkUploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        task = submit_batch(batch, user=request.user)
+        batch.refresh_from_db()
+        
+        data = ResumeBatchSerializer(batch).data
+        if task is not None:
+            data['task_id'] = task.id
+        if batch.status in ('queued', 'running'):
+            return Response(data, status=status.HTTP_202_ACCEPTED)
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['get'], url_path=r'batches/(?P<batch_id>\d+)')
+    def batch(self, request, batch_id=None):
+        """Progress and per-file report of a bulk upload"""
+        try:
+            batch = ResumeBatch.objects.get(id=batch_id)
+        except ResumeBatch.DoesNotExist:
+            return Response({'error': 'Batch not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        if batch.user_id != request.user.id and request.user.role != 'admin':
+            return Response({'error': 'Batch not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(ResumeBatchSerializer(batch).data)
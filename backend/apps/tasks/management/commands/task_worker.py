@@ -0,0 +1,38 @@
+import signal
+
+from django.core.management.base import BaseCommand
+from apps.tasks.queue import run_worker, default_worker_id
+
+
+class Command(BaseCommand):
+    help = 'Process queued background tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--max-tasks', type=int, default=None,
+                            help='Exit after this many tasks')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit as soon as no task is due')
+        parser.add_argument('--worker-id', default=None)
+
+    def handle(self, *args, **options):
+        stopping = []
+
+        def request_stop(signum, frame):
+            # Finish the task in progress, then exit
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        worker_id = options['worker_id'] or default_worker_id()
+        self.stdout.write(f'Task worker {worker_id} started')
+        processed = run_worker(
+            worker_id=worker_id,
+            poll_interval=options['poll_interval'],
+            max_tasks=options['max_tasks'],
+            burst=options['burst'],
+            stop=lambda: bool(stopping),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Task worker {worker_id} stopped after {processed} tasks'))
@@ -0,0 +1,211 @@
+"""
+Database-backed task queue.
+
+Tasks are rows in the tasks table; `manage.py task_worker` processes claim
+them one at a time. On databases that support it (Postgres, MySQL 8) a
+worker claims the next due task with SELECT ... FOR UPDATE SKIP LOCKED, so
+workers never wait on each other. Elsewhere (SQLite) it claims with a
+conditional UPDATE on the status column and tries the next candidate if
+another worker got there first.
+
+Failed tasks are retried with exponential backoff up to max_attempts.
+While a task runs, its worker refreshes the task's locked_at every third of
+TASK_LOCK_TIMEOUT; tasks whose lock has not been refreshed for
+TASK_LOCK_TIMEOUT seconds (their worker died) are re-queued.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(name, max_attempts=3):
+    """Register a function as a task; it is called with the JSON kwargs it was enqueued with"""
+    def register(func):
+        func.task_name = name
+        func.max_attempts = max_attempts
+        _registry[name] = func
+        return func
+    return register
+
+
+def is_enabled():
+    return settings.TASK_QUEUE_ENABLED
+
+
+def enqueue(name, user=None, unique=False, **kwargs):
+    """
+    Queue a registered task and return its Task row
+
+    With unique=True an identical task that has not started yet is reused.
+    """
+    func = _registry.get(name)
+    if func is None:
+        raise KeyError(f'Unknown task {name}')
+
+    if unique:
+        existing = Task.objects.filter(name=name, kwargs=kwargs, status='queued').first()
+        if existing is not None:
+            return existing
+
+    return Task.objects.create(
+        name=name,
+        kwargs=kwargs,
+        max_attempts=func.max_attempts,
+        run_after=timezone.now(),
+        created_by=user,
+    )
+
+
+def _due():
+    return Task.objects.filter(status='queued', run_after__lte=timezone.now()).order_by('run_after', 'id')
+
+
+def claim_next(worker_id):
+    """Mark the next due task as running by this worker and return it, or None"""
+    now = timezone.now()
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            task = _due().select_for_update(skip_locked=True).first()
+            if task is None:
+                return None
+            task.status = 'running'
+            task.locked_by = worker_id
+            task.locked_at = now
+            task.started_at = now
+            task.attempts += 1
+            task.save(update_fields=['status', 'locked_by', 'locked_at', 'started_at', 'attempts'])
+            return task
+
+    for task_id in _due().values_list('id', flat=True)[:10]:
+        claimed = Task.objects.filter(id=task_id, status='queued').update(
+            status='running', locked_by=worker_id, locked_at=now, started_at=now,
+            attempts=F('attempts') + 1
+        )
+        if claimed:
+            return Task.objects.get(id=task_id)
+    return None
+
+
+def requeue_abandoned():
+    """Put back running tasks whose lock is older than TASK_LOCK_TIMEOUT; returns how many"""
+    now = timezone.now()
+    abandoned = Task.objects.filter(status='running', locked_at__lt=now - timedelta(seconds=settings.TASK_LOCK_TIMEOUT))
+    abandoned.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', error='Worker stopped while running the task', locked_by='', locked_at=None, finished_at=now
+    )
+    return abandoned.update(status='queued', locked_by='', locked_at=None, run_after=now)
+
+
+def _beat(task_id, worker_id, stopped):
+    try:
+        while not stopped.wait(settings.TASK_LOCK_TIMEOUT / 3):
+            try:
+                Task.objects.filter(id=task_id, status='running', locked_by=worker_id).update(
+                    locked_at=timezone.now()
+                )
+            except Exception as e:
+                logger.warning(f'Could not refresh the lock of task {task_id}: {str(e)}')
+    finally:
+        connection.close()
+
+
+@contextmanager
+def _heartbeat(task):
+    """Keep the task's lock fresh while it runs, so requeue_abandoned() leaves it alone"""
+    stopped = threading.Event()
+    thread = threading.Thread(target=_beat, args=(task.id, task.locked_by, stopped), daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_task(task):
+    """Execute a claimed task and record its outcome"""
+    func = _registry.get(task.name)
+
+    try:
+        if func is None:
+            raise KeyError(f'Unknown task {task.name}')
+        with _heartbeat(task):
+            result = func(**task.kwargs)
+    except Exception as e:
+        task.error = ''.join(traceback.format_exception_only(type(e), e)).strip()
+        task.locked_by = ''
+        task.locked_at = None
+        if task.attempts < task.max_attempts and func is not None:
+            delay = settings.TASK_RETRY_DELAY * 2 ** (task.attempts - 1)
+            task.status = 'queued'
+            task.run_after = timezone.now() + timedelta(seconds=delay)
+            logger.warning(f'Task {task.id} ({task.name}) failed, retrying in {delay}s: {task.error}')
+        else:
+            task.status = 'failed'
+            task.finished_at = timezone.now()
+            logger.error(f'Task {task.id} ({task.name}) failed: {task.error}')
+        task.save(update_fields=['status', 'error', 'run_after', 'locked_by', 'locked_at', 'finished_at'])
+        return task
+
+    task.status = 'succeeded'
+    task.result = result
+    task.error = ''
+    task.finished_at = timezone.now()
+    task.save(update_fields=['status', 'result', 'error', 'finished_at'])
+    return task
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def run_worker(worker_id=None, poll_interval=1.0, max_tasks=None, burst=False, stop=None):
+    """
+    Process tasks until stop() is true or max_tasks have run
+
+    Sleeps poll_interval seconds whenever the queue is empty, or returns
+    then in burst mode. Returns the number of tasks run.
+    """
+    worker_id = worker_id or default_worker_id()
+    processed = 0
+    last_requeue = 0.0
+
+    while not (stop and stop()):
+        close_old_connections()
+
+        if time.monotonic() - last_requeue > settings.TASK_LOCK_TIMEOUT / 2:
+            requeued = requeue_abandoned()
+            if requeued:
+                logger.warning(f'Re-queued {requeued} abandoned tasks')
+            last_requeue = time.monotonic()
+
+        task = claim_next(worker_id)
+        if task is None:
+            if burst:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        run_task(task)
+        processed += 1
+        if max_tasks is not None and processed >= max_tasks:
+            return processed
+
+    return processed
@@ -0,0 +1,9 @@
+from rest_framework import serializers
+from .models import Task
+
+class TaskSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Task
+        fields = ['id', 'name', 'status', 'result', 'error', 'attempts', 'max_attempts',
+                  'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import task_status
+
+urlpatterns = [
+    path('<int:task_id>/', task_status, name='task-status'),
+]
@@ -0,0 +1,93 @@
+"""
+Benchmark int8-quantized embedding scoring against the float32 baseline.
+
+Builds a synthetic corpus of clustered, normalized 384-d vectors (the shape
+of all-MiniLM-L6-v2 embeddings), reports what storing the int8 copy next to
+the float32 vector costs per embedding row and saves on index rebuilds, then
+reports recall@k and query time for:
+  - float32 brute force (the baseline and ground truth)
+  - int8 scan only
+  - int8 scan + float re-rank of the top k * rerank_factor
+
+Usage: python benchmark_quantization.py --corpus 100000 --queries 200 --k 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ai_engine.quantization import quantize, quantized_scores, search_quantized, top_k
+
+
+def make_corpus(size, dimensions, clusters, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimensions))
+    vectors = centers[rng.integers(0, clusters, size)] + 0.6 * rng.standard_normal((size, dimensions))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def make_queries(corpus, count, seed):
+    rng = np.random.default_rng(seed + 1)
+    queries = corpus[rng.choice(len(corpus), count, replace=False)]
+    queries = queries + 0.3 * rng.standard_normal(queries.shape).astype(np.float32)
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def run(name, search, queries, truth, k):
+    recall = 0.0
+    started = time.perf_counter()
+    for query, expected in zip(queries, truth):
+        found = search(query)
+        recall += len(set(found.tolist()) & expected) / k
+    elapsed = time.perf_counter() - started
+    print(f"{name:<28} recall@{k}: {recall / len(queries):.4f}   {elapsed / len(queries) * 1000:8.2f} ms/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--corpus', type=int, default=100000)
+    parser.add_argument('--dimensions', type=int, default=384)
+    parser.add_argument('--clusters', type=int, default=500)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--rerank-factor', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"Building corpus: {args.corpus} x {args.dimensions}")
+    corpus = make_corpus(args.corpus, args.dimensions, args.clusters, args.seed)
+    queries = make_queries(corpus, args.queries, args.seed)
+
+    started = time.perf_counter()
+    codes, scales = quantize(corpus)
+    print(f"Quantized in {time.perf_counter() - started:.2f} s")
+    print(f"float32 size: {corpus.nbytes / 2**20:8.1f} MiB")
+    print(f"int8 size:    {(codes.nbytes + scales.nbytes) / 2**20:8.1f} MiB")
+
+    # EmbeddingBase rows keep both: the float vector (for re-ranking) and the
+    # int8 codes with an 8-byte scale (so index rebuilds skip quantize())
+    float_row = args.dimensions * 4
+    int8_row = args.dimensions + 8
+    print(f"Stored vector bytes per embedding row: {float_row} float32 + {int8_row} int8 "
+          f"(+{int8_row / float_row:.0%})")
+    started = time.perf_counter()
+    quantize(corpus)
+    print(f"Re-quantizing on each index rebuild would cost {time.perf_counter() - started:.2f} s "
+          f"for {args.corpus} rows")
+
+    k = args.k
+    truth = [set(top_k(corpus @ query, k).tolist()) for query in queries]
+
+    print()
+    run('float32 brute force', lambda q: top_k(corpus @ q, k), queries, truth, k)
+    run('int8 scan', lambda q: top_k(quantized_scores(codes, scales, q), k), queries, truth, k)
+    run(
+        f'int8 scan + rerank x{args.rerank_factor}',
+        lambda q: search_quantized(codes, scales, corpus, q, k, args.rerank_factor)[0],
+        queries, truth, k
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark the ResumeParser text extractors on a large synthetic resume.
+
+Builds resume-like text (contact lines, education, dated experience entries,
+certifications and filler prose) of the requested size, then reports the
+cost of the shared line tokenizer and of each extractor over it, and the
+full _extract_information call.
+
+Usage: python benchmark_resume_parser.py --lines 20000 --repeat 5
+"""
+import argparse
+import random
+import time
+
+from ai_engine.resume_parser import ResumeParser
+from ai_engine.resume_text import ResumeText
+
+SECTIONS = [
+    'Jane Doe',
+    'jane.doe@example.com | +1 (555) 123-4567',
+    'Bachelor of Technology (B.Tech) in Computer Science, 2012 - 2016',
+    'Master of Science (M.Sc) in Data Science',
+    'Senior Software Engineer, Acme Corp 2019 - Present',
+    'Software Engineer, Initech 2016 - 2019',
+    'AWS Certified Solutions Architect',
+    'Certificate in Machine Learning',
+]
+FILLER = ('built and maintained services in python django and react with postgresql docker and kubernetes '
+          'led a team of engineers and improved deployment times by forty percent').split()
+
+
+def make_text(lines, seed):
+    rng = random.Random(seed)
+    out = SECTIONS[:2]
+    while len(out) < lines:
+        if rng.random() < 0.05:
+            out.append(rng.choice(SECTIONS[2:]))
+        else:
+            out.append(' '.join(rng.choices(FILLER, k=rng.randint(4, 16))))
+    return '\n'.join(out)
+
+
+def run(name, fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    print(f"{name:<24} best {min(timings) * 1000:9.2f} ms   mean {sum(timings) / len(timings) * 1000:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--lines', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    text = make_text(args.lines, args.seed)
+    print(f"{args.lines} lines, {len(text) / 1024:.0f} KiB of text\n")
+
+    resume_parser = ResumeParser()
+    doc = ResumeText(text)
+    run('tokenize (ResumeText)', lambda: ResumeText(text), args.repeat)
+    for extractor in ['name', 'email', 'phone', 'skills', 'education', 'experience', 'certifications']:
+        run(extractor, lambda: getattr(resume_parser, f'_extract_{extractor}')(doc), args.repeat)
+    run('_extract_information', lambda: resume_parser._extract_information(text), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
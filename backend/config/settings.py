@@ -29,6 +29,7 @@ INSTALLED_APPS = [
     'apps.interviews',
     'apps.analytics',
     'apps.feedback',
+    'apps.tasks',
 ]
 
 MIDDLEWARE = [
@@ -145,3 +146,101 @@ AUTH_USER_MODEL = 'authentication.User'
 
 # Static files - WhiteNoise
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
+# AI models - load the embedding model in the gunicorn master (use with --preload);
+# workers run the warmup encode after the fork (see gunicorn.conf.py)
+PRELOAD_EMBEDDING_MODEL = os.getenv('PRELOAD_EMBEDDING_MODEL', 'False') == 'True'
+
+# Uploaded resumes are parsed and embedded after the upload returns (status
+# 'queued'), by RESUME_INGEST_WORKERS threads per process, or by the task
+# queue when it is enabled. With ASYNC off uploads wait for ingestion.
+RESUME_INGEST_ASYNC = os.getenv('RESUME_INGEST_ASYNC', 'True') == 'True'
+RESUME_INGEST_WORKERS = int(os.getenv('RESUME_INGEST_WORKERS', '2'))
+
+# Resume parsing limits: larger files are rejected, PDF pages past MAX_PAGES
+# are ignored and PDF text extraction fails after TIMEOUT_SECONDS. PDFs with
+# at least PARALLEL_PAGES pages are extracted by a pool of PDF_WORKERS processes.
+RESUME_MAX_FILE_MB = int(os.getenv('RESUME_MAX_FILE_MB', '10'))
+RESUME_PDF_MAX_PAGES = int(os.getenv('RESUME_PDF_MAX_PAGES', '50'))
+RESUME_PARSE_TIMEOUT_SECONDS = float(os.getenv('RESUME_PARSE_TIMEOUT_SECONDS', '30'))
+RESUME_PDF_PARALLEL_PAGES = int(os.getenv('RESUME_PDF_PARALLEL_PAGES', '20'))
+RESUME_PDF_WORKERS = int(os.getenv('RESUME_PDF_WORKERS', '4'))
+# Scanned pages (images, and PDF pages without text) are OCRed in grayscale at
+# OCR_DPI, in the same process pool; each page gets PAGE_TIMEOUT_SECONDS.
+RESUME_OCR_DPI = int(os.getenv('RESUME_OCR_DPI', '300'))
+RESUME_OCR_PAGE_TIMEOUT_SECONDS = float(os.getenv('RESUME_OCR_PAGE_TIMEOUT_SECONDS', '20'))
+
+# Parse results are cached by the SHA-256 of the uploaded file and the parser
+# version, so identical uploads skip parsing; at most CACHE_SIZE entries are
+# kept, least recently used evicted first (0 disables the cache).
+RESUME_PARSE_CACHE_SIZE = int(os.getenv('RESUME_PARSE_CACHE_SIZE', '5000'))
+
+# Bulk uploads (POST /api/resumes/bulk/) accept up to BULK_MAX_FILES resumes
+# and BULK_MAX_MB in all (an archive counts at its uploaded, compressed size;
+# its files are expanded in the background, also up to BULK_MAX_MB). Each
+# batch is parsed by a pool of BULK_WORKERS processes (0: one per available
+# CPU, at most 4; each process loads the parser's models).
+RESUME_BULK_MAX_FILES = int(os.getenv('RESUME_BULK_MAX_FILES', '500'))
+RESUME_BULK_MAX_MB = int(os.getenv('RESUME_BULK_MAX_MB', '200'))
+RESUME_BULK_WORKERS = int(os.getenv('RESUME_BULK_WORKERS', '0'))
+# Django rejects multipart requests with more files than this
+DATA_UPLOAD_MAX_NUMBER_FILES = max(100, RESUME_BULK_MAX_FILES)
+
+# Skill taxonomy (canonical skills and their aliases) used by the resume
+# parser, matching, job skills and analytics; empty uses the bundled
+# ai_engine/data/skills.txt. After changing it run `manage.py compile_skills`.
+SKILL_TAXONOMY_FILE = os.getenv('SKILL_TAXONOMY_FILE', '')
+
+# Vector indexes used to find the best jobs/resumes without scoring every row.
+# Below the exact threshold searches are brute force; above it an IVF index
+# probes VECTOR_INDEX_N_PROBE clusters.
+VECTOR_INDEX_DIR = os.getenv('VECTOR_INDEX_DIR', str(BASE_DIR / 'vector_indexes'))
+VECTOR_INDEX_EXACT_THRESHOLD = int(os.getenv('VECTOR_INDEX_EXACT_THRESHOLD', '2000'))
+VECTOR_INDEX_N_PROBE = int(os.getenv('VECTOR_INDEX_N_PROBE', '8'))
+VECTOR_INDEX_SYNC_SECONDS = int(os.getenv('VECTOR_INDEX_SYNC_SECONDS', '10'))
+VECTOR_INDEX_MAX_TAIL = int(os.getenv('VECTOR_INDEX_MAX_TAIL', '1000'))
+# Scan int8-quantized vectors and re-rank the best k * RERANK_FACTOR with floats
+VECTOR_INDEX_QUANTIZED = os.getenv('VECTOR_INDEX_QUANTIZED', 'True') == 'True'
+VECTOR_INDEX_RERANK_FACTOR = int(os.getenv('VECTOR_INDEX_RERANK_FACTOR', '4'))
+
+# Optional embedding sidecar: when set, workers send encode requests to
+# `python manage.py embedding_server` over this Unix socket instead of
+# loading the model themselves.
+EMBEDDING_SERVER_SOCKET = os.getenv('EMBEDDING_SERVER_SOCKET', '')
+
+# Micro-batching: concurrent encode calls (threads in a worker, or clients of
+# the embedding server) wait up to MAX_WAIT_MS to be run as one batch.
+EMBEDDING_BATCHING = os.getenv('EMBEDDING_BATCHING', 'True') == 'True'
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv('EMBEDDING_BATCH_MAX_SIZE', '64'))
+EMBEDDING_BATCH_MAX_WAIT_MS = int(os.getenv('EMBEDDING_BATCH_MAX_WAIT_MS', '5'))
+
+# Content-addressed embedding cache: an in-memory LRU of CACHE_SIZE vectors
+# (0 disables it), optionally backed by a memory-mapped file shared by all
+# processes on the machine.
+EMBEDDING_CACHE_SIZE = int(os.getenv('EMBEDDING_CACHE_SIZE', '10000'))
+EMBEDDING_DISK_CACHE_PATH = os.getenv('EMBEDDING_DISK_CACHE_PATH', '')
+EMBEDDING_DISK_CACHE_SLOTS = int(os.getenv('EMBEDDING_DISK_CACHE_SLOTS', '200000'))
+
+# Matches scored against an older version of a resume or job are re-scored
+# in a background thread, MATCH_RECOMPUTE_BATCH_SIZE at a time. With ASYNC
+# off they are re-scored when the saving transaction commits.
+MATCH_RECOMPUTE_ASYNC = os.getenv('MATCH_RECOMPUTE_ASYNC', 'True') == 'True'
+MATCH_RECOMPUTE_BATCH_SIZE = int(os.getenv('MATCH_RECOMPUTE_BATCH_SIZE', '100'))
+
+# Working memory for one resume x job score tile in `manage.py score_all_pairs`;
+# the embedding matrices themselves are memory-mapped from a temp directory.
+MATCH_ALL_PAIRS_MEMORY_MB = int(os.getenv('MATCH_ALL_PAIRS_MEMORY_MB', '64'))
+
+# Share of resume/job pairs that pass the skill-overlap prefilter of a
+# cascade match (POST /api/match/ with "cascade": true).
+MATCH_CASCADE_KEEP_FRACTION = float(os.getenv('MATCH_CASCADE_KEEP_FRACTION', '0.2'))
+
+# Background task queue (apps.tasks). When enabled, resume parsing, job
+# application scoring and multi-job matching are queued and their endpoints
+# return 202 with a task id; run `python manage.py task_worker` to process
+# them. Failed tasks retry after TASK_RETRY_DELAY seconds, doubling each
+# attempt. A worker refreshes its running task's lock every third of
+# TASK_LOCK_TIMEOUT; tasks whose lock is older than that are re-queued.
+TASK_QUEUE_ENABLED = os.getenv('TASK_QUEUE_ENABLED', 'False') == 'True'
+TASK_RETRY_DELAY = int(os.getenv('TASK_RETRY_DELAY', '10'))
+TASK_LOCK_TIMEOUT = int(os.getenv('TASK_LOCK_TIMEOUT', '900'))
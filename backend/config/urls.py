@@ -5,7 +5,12 @@ from django.conf.urls.static import static
 from django.http import JsonResponse
 
 def health_check(request):
-    return JsonResponse({'status': 'healthy', 'service': 'job-portal-backend'})
+    from ai_engine.model_registry import registry
+    return JsonResponse({
+        'status': 'healthy',
+        'service': 'job-portal-backend',
+        'embedding_models': registry.stats(),
+    })
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -17,6 +22,7 @@ urlpatterns = [
     path('api/interviews/', include('apps.interviews.urls')),
     path('api/analytics/', include('apps.analytics.urls')),
     path('api/feedback/', include('apps.feedback.urls')),
+    path('api/tasks/', include('apps.tasks.urls')),
 ]
 
 if settings.DEBUG:
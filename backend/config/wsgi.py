@@ -1,5 +1,20 @@
+import logging
 import os
+
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 application = get_wsgi_application()
+
+# Load the embedding model before gunicorn forks workers (requires --preload),
+# so every worker shares the same model pages copy-on-write. Only the load
+# runs here; each worker runs its warmup encode after the fork (see
+# gunicorn.conf.py and ModelRegistry.preload).
+if settings.PRELOAD_EMBEDDING_MODEL and not settings.EMBEDDING_SERVER_SOCKET:
+    try:
+        from ai_engine.model_registry import registry
+        from ai_engine.semantic_matcher import MODEL_NAME
+        registry.preload(MODEL_NAME)
+    except Exception:
+        logging.getLogger(__name__).exception('Embedding model preload failed')
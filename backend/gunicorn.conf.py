@@ -0,0 +1,19 @@
+"""
+Gunicorn settings, read from the directory gunicorn starts in (backend/).
+
+With --preload and PRELOAD_EMBEDDING_MODEL, config.wsgi loads the embedding
+model in the master without running it; each worker runs the warmup encode
+after the fork, so torch's thread pools are started in the worker.
+"""
+import logging
+
+
+def post_fork(server, worker):
+    from ai_engine.model_registry import registry
+    from ai_engine.semantic_matcher import MODEL_NAME
+    if not registry.is_loaded(MODEL_NAME):
+        return
+    try:
+        registry.warmup(MODEL_NAME)
+    except Exception:
+        logging.getLogger(__name__).exception('Embedding model warmup failed')